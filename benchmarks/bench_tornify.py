@@ -0,0 +1,339 @@
+"""Benchmarks for Tornify.
+
+Runs tornify.main() against a RecordingPage: a real ft.Page wired to a
+connection that answers like the Flet client but only records what would
+have been sent over the wire, so no window is needed.
+
+    python benchmarks/bench_tornify.py
+    python benchmarks/bench_tornify.py --sizes 8 64 512 --repeat 3 -o before.json
+
+Results are printed (and optionally written) as JSON so runs from two
+commits can be diffed.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import flet as ft
+from flet.core.local_connection import LocalConnection
+from flet.core.protocol import ClientActions, ClientMessage, CommandEncoder, PageCommandsBatchResponsePayload
+
+import tornify
+
+DEFAULT_SIZES = [8, 64, 512, 4096, 65536]
+
+
+class RecordingConnection(LocalConnection):
+    """Answers page commands like the client would and records the payload size,
+    also into `profiler` once one is set."""
+
+    def __init__(self):
+        super().__init__()
+        self.sends = 0
+        self.bytes_sent = 0
+        self.profiler = None
+
+    def send_commands(self, session_id, commands):
+        results = []
+        messages = []
+        for command in commands:
+            result, message = self._process_command(command)
+            if command.name in ["add", "get"]:
+                results.append(result)
+            if message:
+                messages.append(message)
+        if messages:
+            payload = json.dumps(ClientMessage(ClientActions.PAGE_CONTROLS_BATCH, messages), cls=CommandEncoder, separators=(",", ":"))
+            size = len(payload.encode("utf-8"))
+            self.sends += 1
+            self.bytes_sent += size
+            if self.profiler is not None:
+                self.profiler.record_value("update_bytes", size)
+        return PageCommandsBatchResponsePayload(results=results, error="")
+
+
+class RecordingPage(ft.Page):
+    """ft.Page stand-in: async tasks are recorded instead of scheduled.
+
+    Tasks named in `run_to_completion` (the chunked bracket build) are run right
+    away instead, so the measured action includes them.
+    """
+
+    run_to_completion = {"build_bracket"}
+
+    def __init__(self):
+        self.recorder = RecordingConnection()
+        self.tasks = []
+        super().__init__(self.recorder, "bench", asyncio.new_event_loop())
+
+    def run_task(self, handler, *args, **kwargs):
+        name = getattr(handler, "__name__", str(handler))
+        self.tasks.append(name)
+        if name in self.run_to_completion:
+            self.loop.run_until_complete(handler(*args, **kwargs))
+
+    def run_thread(self, handler, *args, **kwargs):
+        handler(*args, **kwargs)
+
+
+class Probe:
+    """Captures the profiler and scheduler main() creates for the page."""
+
+    def __init__(self):
+        self.profiler = None
+        self.scheduler = None
+        probe = self
+
+        class BenchProfiler(tornify.Profiler):
+            def __init__(self):
+                super().__init__()
+                self.enabled = True
+                probe.profiler = self
+
+        class BenchScheduler(tornify.RenderScheduler):
+            def __init__(self, page):
+                super().__init__(page)
+                probe.scheduler = self
+
+        tornify.Profiler = BenchProfiler
+        tornify.RenderScheduler = BenchScheduler
+
+
+def walk(control):
+    stack = [control]
+    while stack:
+        ctrl = stack.pop()
+        if ctrl is None:
+            continue
+        yield ctrl
+        stack.extend(reversed(ctrl._get_children()))
+
+
+def find(page, predicate):
+    for ctrl in walk(page):
+        if predicate(ctrl):
+            return ctrl
+    raise LookupError("control not found")
+
+
+def fire(page, control, handler_name, data=""):
+    handler = getattr(control, handler_name)
+    handler(ft.ControlEvent(control.uid, handler_name[3:], data, control, page))
+
+
+def button(page, text):
+    return find(page, lambda c: isinstance(c, ft.ElevatedButton) and c.text == text)
+
+
+def result_slot(page):
+    """First player slot of the bracket that can take a double-tap result."""
+    def is_slot(c):
+        if not isinstance(c, ft.GestureDetector) or c.on_double_tap is None:
+            return False
+        data = getattr(c.content, "data", None) or c.data
+        return data is not None
+    return find(page, is_slot)
+
+
+class Measure:
+    def __init__(self, page, probe):
+        self.page = page
+        self.probe = probe
+
+    def __call__(self, fn):
+        rec = self.page.recorder
+        sends, sent = rec.sends, rec.bytes_sent
+        flushes = sum(self.probe.scheduler.flushes.values())
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        updates = rec.sends - sends
+        return {
+            "ms": elapsed * 1000,
+            "updates": updates,
+            "bytes": rec.bytes_sent - sent,
+            "bytes_per_update": (rec.bytes_sent - sent) / updates if updates else 0,
+            "flushes": sum(self.probe.scheduler.flushes.values()) - flushes,
+        }
+
+
+def run_once(num_players, track_memory=False):
+    probe = Probe()
+    page = RecordingPage()
+    tornify.main(page)
+    page.recorder.profiler = probe.profiler
+    measure = Measure(page, probe)
+    result = {"players": num_players}
+
+    names_input = find(page, lambda c: isinstance(c, ft.TextField) and c.label == "Digite nomes aqui")
+    names_input.value = "\n".join(f"Jogador {i + 1}" for i in range(num_players))
+    result["roster_import"] = measure(lambda: fire(page, names_input, "on_submit"))
+
+    start_button = button(page, "▶️ Iniciar")
+    if track_memory:
+        tracemalloc.start()
+    result["start_tournament"] = measure(lambda: fire(page, start_button, "on_click"))
+    if track_memory:
+        result["start_tournament"]["peak_kib"] = tracemalloc.get_traced_memory()[1] / 1024
+        tracemalloc.stop()
+
+    render = probe.profiler.stats().get("render_bracket", {})
+    result["render_bracket"] = {
+        "ms": render.get("total_ms", 0.0) / max(1, render.get("count", 1)),
+        "controls": probe.profiler.gauges.get("controls_per_render", 0),
+    }
+
+    slot = result_slot(page)
+    result["single_result"] = measure(lambda: fire(page, slot, "on_double_tap"))
+
+    result["zoom_in"] = measure(lambda: fire(page, button(page, "🔍+"), "on_click"))
+    result["zoom_out"] = measure(lambda: fire(page, button(page, "🔍-"), "on_click"))
+
+    def zoom_to_overview():
+        for _ in range(5):
+            fire(page, button(page, "🔍-"), "on_click")
+    result["zoom_to_overview"] = measure(zoom_to_overview)
+    result["zoom_to_overview"]["controls"] = probe.profiler.gauges.get("controls_per_render", 0)
+    for _ in range(5):
+        fire(page, button(page, "🔍+"), "on_click")
+
+    dropdown = find(page, lambda c: isinstance(c, ft.Dropdown) and c.label == "Tema")
+    dropdown.value = "Ciano"
+    result["theme_switch"] = measure(lambda: fire(page, dropdown, "on_change"))
+
+    result["profile"] = probe.profiler.stats()
+    result["payloads"] = probe.profiler.value_stats()
+    result["scheduler"] = probe.scheduler.stats()
+    return result
+
+
+def run_history(tournaments=500, entrants=64):
+    """Fills a HistoryStore with a season of tournaments and times the stats queries."""
+    result = {"tournaments": tournaments, "entrants": entrants}
+    with tempfile.TemporaryDirectory() as folder:
+        store = tornify.HistoryStore(os.path.join(folder, "history.db"))
+        rng = random.Random(0)
+        names = [f"Jogador {i + 1}" for i in range(entrants * 4)]
+
+        def query(method, *args):
+            done = threading.Event()
+            rows = []
+            errors = []
+            start = time.perf_counter()
+            method(*args, on_done=lambda r: (rows.append(r), done.set()), on_error=lambda ex: (errors.append(ex), done.set()))
+            done.wait()
+            if errors:
+                raise errors[0]
+            return (time.perf_counter() - start) * 1000, rows[0]
+
+        start = time.perf_counter()
+        for t in range(tournaments):
+            tournament = {}
+            store.begin_tournament(tournament, "Geral", str(t), entrants, t)
+            alive = rng.sample(names, entrants)
+            match_no = 0
+            while len(alive) > 1:
+                rows, winners = [], []
+                for p1, p2 in zip(alive[0::2], alive[1::2]):
+                    winner, loser = (p1, p2) if rng.random() < 0.5 else (p2, p1)
+                    rows.append((match_no, f"Round of {len(alive)}", p1, p2, winner, loser, "1-0", 0, t))
+                    winners.append(winner)
+                    match_no += 1
+                store.record_round(tournament, rows)
+                alive = winners
+            store.crown(tournament, alive[0])
+        query(store.season, 0)  # runs after every write queued before it
+        result["record_ms"] = (time.perf_counter() - start) * 1000
+        result["season_ms"], rows = query(store.season, 0)
+        result["players"] = len(rows)
+        result["history_ms"], _ = query(store.history, names[0], 50)
+        result["head_to_head_ms"], _ = query(store.head_to_head, names[0], names[1])
+        result["games_ms"], games = query(store.games)
+        start = time.perf_counter()
+        tornify.RatingEngine().replay(*games)
+        result["rating_replay_ms"] = (time.perf_counter() - start) * 1000
+        store.close()
+    return result
+
+
+def check_standings():
+    """A late entry adds a place: the entrant and the losers placed last must be able
+    to end in it."""
+    players = [tornify.Player(i, f"Jogador {i + 1}") for i in range(7)]
+    standings = tornify.Standings(players, lambda name: 1500.0)
+    # round of 4 matches (the last one a bye): the losers share places 5-7
+    for match_id, (winner, loser) in enumerate(zip(players[0:6:2], players[1:6:2])):
+        standings.credit(match_id, winner, loser, 0, 4)
+    late = tornify.Player(7, "Jogador 8")
+    standings.add(late)
+    ranges = {player.id: (first, last) for _, player, first, last in standings.rows()}
+    assert ranges[late.id] == (1, 8), ranges[late.id]
+    assert ranges[players[1].id] == (5, 8), ranges[players[1].id]
+
+
+def summarize(runs):
+    """Median of every numeric leaf over the repeated runs."""
+    first = runs[0]
+    if isinstance(first, dict):
+        return {k: summarize([r[k] for r in runs]) for k in first}
+    if isinstance(first, (int, float)) and not isinstance(first, bool):
+        return statistics.median(runs)
+    return first
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL,
+            text=True,
+        ).strip()
+    except Exception:
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--memory", action="store_true", help="track peak memory of start_tournament (slow)")
+    parser.add_argument("-o", "--output", help="write the JSON report to this file")
+    args = parser.parse_args(argv)
+    check_standings()
+
+    report = {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "flet": getattr(ft, "__version__", None) or ft.version.version,
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "results": [],
+    }
+    for size in args.sizes:
+        runs = [run_once(size, track_memory=args.memory) for _ in range(args.repeat)]
+        report["results"].append(summarize(runs))
+        print(f"{size} players done", file=sys.stderr)
+
+    report["history"] = summarize([run_history() for _ in range(args.repeat)])
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
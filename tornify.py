@@ -2,9 +2,26 @@ import flet as ft
 import flet.canvas as cv
 import random
 import math
+import bisect
+import heapq
 import asyncio
 import sys, os
-from collections import defaultdict
+import functools
+import threading
+import json
+import csv
+import time
+import queue
+import sqlite3
+import unicodedata
+from array import array
+from collections import Counter, OrderedDict, defaultdict, deque
+from contextlib import contextmanager
+
+try:
+    import numpy as np
+except ImportError:  # ratings are replayed in plain Python instead
+    np = None
 
 def resource_path(relative_path):
     """Ajusta o caminho de arquivos quando o app é empacotado em .exe"""
@@ -20,6 +37,112 @@ class Player:
         self.name = name
         self.score = 0
         self.losses = 0
+        self.withdrawn = False
+
+def normalize_name(name):
+    """Lowercase, accent-free, single-spaced form of a name used for searching."""
+    decomposed = unicodedata.normalize("NFKD", name)
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return " ".join(stripped.casefold().split())
+
+def name_trigrams(normalized):
+    padded = f"  {normalized} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class PlayerIndex:
+    """Search index from normalized player names to Player.id and the player's current match.
+
+    Prefix search bisects a sorted list holding the full name and every word of it, so
+    "silva" finds "João Silva"; when that gives too few hits, names sharing the most
+    trigrams with the query are added (fuzzy search).
+    """
+
+    def __init__(self):
+        self.players = {}  # player id -> Player
+        self.locations = {}  # player id -> deepest Match the player currently appears in
+        self._keys = []  # sorted (key, player id)
+        self._keys_of = {}
+        self._trigrams = defaultdict(set)
+        self._trigrams_of = {}
+
+    @staticmethod
+    def _name_keys(normalized):
+        words = normalized.split(" ")
+        return sorted({" ".join(words[i:]) for i in range(len(words))})
+
+    def rebuild(self, players):
+        self.players = {p.id: p for p in players}
+        self._keys = []
+        self._keys_of = {}
+        self._trigrams = defaultdict(set)
+        self._trigrams_of = {}
+        for player in players:
+            normalized = normalize_name(player.name)
+            keys = self._keys_of[player.id] = self._name_keys(normalized)
+            self._keys.extend((key, player.id) for key in keys)
+            grams = self._trigrams_of[player.id] = name_trigrams(normalized)
+            for gram in grams:
+                self._trigrams[gram].add(player.id)
+        self._keys.sort()
+
+    def add(self, player):
+        """Indexes a player that joined after the index was built."""
+        self.players[player.id] = player
+        self._index(player)
+
+    def rename(self, player):
+        """Re-indexes a player after player.name changed."""
+        if player.id not in self.players:
+            return
+        for key in self._keys_of.get(player.id, ()):
+            i = bisect.bisect_left(self._keys, (key, player.id))
+            if i < len(self._keys) and self._keys[i] == (key, player.id):
+                del self._keys[i]
+        for gram in self._trigrams_of.get(player.id, ()):
+            self._trigrams[gram].discard(player.id)
+        self._index(player)
+
+    def _index(self, player):
+        normalized = normalize_name(player.name)
+        self._keys_of[player.id] = self._name_keys(normalized)
+        for key in self._keys_of[player.id]:
+            bisect.insort(self._keys, (key, player.id))
+        grams = self._trigrams_of[player.id] = name_trigrams(normalized)
+        for gram in grams:
+            self._trigrams[gram].add(player.id)
+
+    def search(self, query, limit=8):
+        """Ids of the players matching `query`: prefix matches first, then fuzzy ones."""
+        query = normalize_name(query)
+        if not query:
+            return []
+        found = []
+        seen = set()
+        i = bisect.bisect_left(self._keys, (query,))
+        while i < len(self._keys) and len(found) < limit:
+            key, player_id = self._keys[i]
+            if not key.startswith(query):
+                break
+            if player_id not in seen:
+                seen.add(player_id)
+                found.append(player_id)
+            i += 1
+        if len(found) < limit and len(query) >= 3:
+            grams = name_trigrams(query)
+            shared = Counter()
+            for gram in grams:
+                shared.update(self._trigrams.get(gram, ()))
+            scored = []
+            for player_id, common in shared.items():
+                if player_id in seen:
+                    continue
+                similarity = common / (len(grams) + len(self._trigrams_of[player_id]) - common)
+                if similarity >= 0.3:
+                    scored.append((-similarity, player_id))
+            scored.sort()
+            found.extend(player_id for _, player_id in scored[:limit - len(found)])
+        return found
+
 
 class Match:
     def __init__(self, player1=None, player2=None, previous1=None, previous2=None, use_losers=False, is_champion_slot=False, set_parent=True):
@@ -36,53 +159,1408 @@ class Match:
                 self.previous2.parent = self
         self.winner = None
         self.parent = None
-        self.update_func = None
+        self.view = None
         self.id = None
         self._had_winner = False
-        self.p1_series = 0
-        self.p2_series = 0
+        # the winner was handed the match because the other side could never be filled
+        self.auto_winner = False
+        # games of the series, oldest first: bit i is set when player 2 won game i
+        self.games = 0
+        self.games_played = 0
         self.best_of = 1
         # flags for special behavior
         self.use_losers = use_losers
         self.is_champion_slot = is_champion_slot
+        # (first, last) places played out by a placement bracket; None in the main bracket
+        self.places = None
+        # players on each side as of the last resolve(), and how many sides can ever get one
+        self.resolved1 = None
+        self.resolved2 = None
+        self.live = 0
+        # result counted in Player.score/losses: (winner, loser), or the champion on the champion slot
+        self.credited = None
+        self.rating_delta = 0.0
         if self.player1 is None and self.player2 is not None:
             self.winner = self.player2
         elif self.player2 is None and self.player1 is not None:
             self.winner = self.player1
 
-    def get_player1(self):
-        # If this match is configured to use losers, fetch the loser from previous1
+    def resolve(self):
+        """Takes both sides from the feeding matches, which must already be resolved.
+
+        Returns True when a side changed. Only looks one match back, so evaluating the
+        matches in MatchGraph order resolves the whole bracket in one pass.
+        """
         if self.use_losers:
-            if self.previous1:
-                return self.previous1.get_loser()
-            return None
-        if self.player1 is not None:
-            return self.player1
-        if self.previous1 and self.previous1.winner:
-            return self.previous1.winner
-        return None
+            p1 = self.previous1.get_loser() if self.previous1 else None
+            p2 = self.previous2.get_loser() if self.previous2 else None
+            # a match only ever has a loser when both of its sides can be filled
+            live = sum(previous is not None and previous.live == 2 for previous in (self.previous1, self.previous2))
+        else:
+            p1 = self.player1 if self.player1 is not None else (self.previous1.winner if self.previous1 else None)
+            p2 = self.player2 if self.player2 is not None else (self.previous2.winner if self.previous2 else None)
+            live = sum(
+                player is not None or (previous is not None and previous.live > 0)
+                for player, previous in ((self.player1, self.previous1), (self.player2, self.previous2))
+            )
+        self.live = live
+        if p1 is self.resolved1 and p2 is self.resolved2:
+            return False
+        self.resolved1 = p1
+        self.resolved2 = p2
+        return True
+
+    @property
+    def p2_series(self):
+        return bin(self.games).count("1")
+
+    @property
+    def p1_series(self):
+        return self.games_played - self.p2_series
+
+    def wins_needed(self):
+        return self.best_of // 2 + 1
+
+    def add_game(self, side):
+        if side:
+            self.games |= 1 << self.games_played
+        self.games_played += 1
+
+    def undo_game(self):
+        if self.games_played:
+            self.games_played -= 1
+            self.games &= ~(1 << self.games_played)
+
+    def clear_games(self):
+        self.games = 0
+        self.games_played = 0
+
+    def set_series(self, p1_wins, p2_wins):
+        """Replaces the games with a final score, logging the games of the side ahead last."""
+        self.clear_games()
+        order = (1, 0) if p1_wins >= p2_wins else (0, 1)
+        for side in order:
+            for _ in range(p2_wins if side else p1_wins):
+                self.add_game(side)
+
+    def game_log(self):
+        """Side (0 or 1) that won each game, oldest first."""
+        return [(self.games >> i) & 1 for i in range(self.games_played)]
+
+    def get_player1(self):
+        return self.resolved1
 
     def get_player2(self):
-        if self.use_losers:
-            if self.previous2:
-                return self.previous2.get_loser()
-            return None
-        if self.player2 is not None:
-            return self.player2
-        if self.previous2 and self.previous2.winner:
-            return self.previous2.winner
-        return None
+        return self.resolved2
 
     def get_loser(self):
         # Return the loser of this match (only valid if winner is set)
-        p1 = self.get_player1()
-        p2 = self.get_player2()
+        p1 = self.resolved1
+        p2 = self.resolved2
         if self.winner is None:
             return None
         if p1 and p2:
             return p2 if self.winner == p1 else p1
         return None
 
+def placement_brackets(rounds, last_place, base=0, column=0):
+    """Loser-fed brackets playing out the places below an elimination bracket.
+
+    `rounds` are the levels of a bracket deciding places base+1 and base+2, final
+    last, with its first level drawn in `column`. The losers of a level of m matches
+    play for places base+m+1 to base+2m in a bracket of their own, which gets its own
+    placement brackets in turn, so every entrant ends with a place. Only brackets
+    whose best place is at most `last_place` are created.
+
+    Returns (places, column, rounds) groups.
+    """
+    groups = []
+    for level, level_matches in enumerate(rounds):
+        count = len(level_matches)
+        if count < 2 or base + count + 1 > last_place:
+            continue
+        places = (base + count + 1, base + 2 * count)
+        current = [
+            Match(previous1=a, previous2=b, use_losers=True, set_parent=False)
+            for a, b in zip(level_matches[0::2], level_matches[1::2])
+        ]
+        group_rounds = [current]
+        while len(current) > 1:
+            current = [Match(previous1=a, previous2=b) for a, b in zip(current[0::2], current[1::2])]
+            group_rounds.append(current)
+        for round_matches in group_rounds:
+            for match in round_matches:
+                match.places = places
+        groups.append((places, column + level + 1, group_rounds))
+        groups.extend(placement_brackets(group_rounds, last_place, base + count, column + level + 1))
+    return groups
+
+class MatchGraph:
+    """The match graph of a bracket, compiled once into a topological order.
+
+    `order` lists every match after the matches feeding it, whatever order they were
+    created in, and `rank` maps a match id to its position there. `fanout[i]` holds the
+    ranks of the matches fed by `order[i]`, winners and losers alike, and `level` maps
+    a match id to its round: the number of winner feeds back to a first match.
+    """
+    __slots__ = ("order", "rank", "fanout", "level")
+
+    def __init__(self, matches):
+        fed_by = {m.id: [prev for prev in (m.previous1, m.previous2) if prev is not None] for m in matches}
+        feeds_of = defaultdict(list)
+        for m in matches:
+            for prev in fed_by[m.id]:
+                feeds_of[prev.id].append(m)
+        waiting = {m.id: len(fed_by[m.id]) for m in matches}
+        ready = deque(m for m in matches if not waiting[m.id])
+        self.order = []
+        self.level = {}
+        while ready:
+            m = ready.popleft()
+            self.order.append(m)
+            self.level[m.id] = 0 if m.use_losers or not fed_by[m.id] else 1 + max(self.level[prev.id] for prev in fed_by[m.id])
+            for dependent in feeds_of[m.id]:
+                waiting[dependent.id] -= 1
+                if not waiting[dependent.id]:
+                    ready.append(dependent)
+        if len(self.order) != len(matches):
+            raise ValueError("match graph has a cycle")
+        self.rank = {m.id: i for i, m in enumerate(self.order)}
+        self.fanout = [[self.rank[d.id] for d in feeds_of[m.id]] for m in self.order]
+
+    def downstream(self, sources, visit):
+        """Calls visit(match) on `sources` and, in order, on every match they feed for as long
+        as visit returns True (the match changed). Returns the matches that were visited."""
+        heap = sorted({self.rank[m.id] for m in sources})
+        queued = set(heap)
+        visited = []
+        while heap:
+            i = heapq.heappop(heap)
+            match = self.order[i]
+            visited.append(match)
+            if not visit(match):
+                continue
+            for j in self.fanout[i]:
+                if j not in queued:
+                    queued.add(j)
+                    heapq.heappush(heap, j)
+        return visited
+
+def count_controls(control):
+    """Counts a control and all of its descendants."""
+    total = 0
+    stack = [control]
+    while stack:
+        ctrl = stack.pop()
+        if ctrl is None:
+            continue
+        total += 1
+        try:
+            stack.extend(ctrl._get_children())
+        except Exception:
+            pass
+    return total
+
+class RenderCache:
+    """Rendered brackets of the categories off screen, least recently used first.
+
+    An entry costs the number of controls in its tree, which is what dominates its
+    memory. Once the total goes over `max_controls` the coldest entries are dropped;
+    their categories keep their match state and are rendered again when reopened.
+    """
+
+    def __init__(self, max_controls):
+        self.max_controls = max_controls
+        self.entries = OrderedDict()  # key -> (tree, cost)
+        self.total = 0
+
+    def put(self, key, tree, cost):
+        """Stores a tree as the most recently used; returns the (key, tree) entries evicted
+        to fit it, which may include this one when it alone is over the budget."""
+        self.discard(key)
+        self.entries[key] = (tree, cost)
+        self.total += cost
+        evicted = []
+        while self.total > self.max_controls and self.entries:
+            old_key, (old_tree, old_cost) = self.entries.popitem(last=False)
+            self.total -= old_cost
+            evicted.append((old_key, old_tree))
+        return evicted
+
+    def take(self, key):
+        """Removes and returns the tree stored for `key`, or None when it is not cached."""
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return None
+        self.total -= entry[1]
+        return entry[0]
+
+    def discard(self, key):
+        self.take(key)
+
+class CategoryHost(ft.Container):
+    """Container holding the screen of one category.
+
+    A parked host (a category off screen) is isolated: updating its parents sends its
+    own attributes but does not walk its subtree, so a hidden bracket costs nothing
+    to the updates of the one on screen.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.parked = False
+
+    def is_isolated(self):
+        return self.parked
+
+class HistoryStore:
+    """Local SQLite history of players, tournaments, matches and results.
+
+    A worker thread owns the connection (in WAL mode) and runs every write and query
+    in the order they were queued, so the window never waits on the disk. Callbacks
+    given to the queries run on that thread too.
+    """
+
+    schema = """
+        CREATE TABLE IF NOT EXISTS players (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE
+        );
+        CREATE TABLE IF NOT EXISTS tournaments (
+            id INTEGER PRIMARY KEY,
+            category TEXT NOT NULL,
+            seed TEXT,
+            entrants INTEGER NOT NULL,
+            started_at REAL NOT NULL,
+            champion_id INTEGER REFERENCES players (id)
+        );
+        CREATE TABLE IF NOT EXISTS matches (
+            tournament_id INTEGER NOT NULL REFERENCES tournaments (id),
+            match_no INTEGER NOT NULL,
+            round TEXT NOT NULL,
+            player1_id INTEGER NOT NULL REFERENCES players (id),
+            player2_id INTEGER NOT NULL REFERENCES players (id),
+            PRIMARY KEY (tournament_id, match_no)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS results (
+            tournament_id INTEGER NOT NULL,
+            match_no INTEGER NOT NULL,
+            winner_id INTEGER NOT NULL REFERENCES players (id),
+            loser_id INTEGER NOT NULL REFERENCES players (id),
+            score TEXT,
+            walkover INTEGER NOT NULL DEFAULT 0,
+            decided_at REAL NOT NULL,
+            PRIMARY KEY (tournament_id, match_no),
+            FOREIGN KEY (tournament_id, match_no) REFERENCES matches (tournament_id, match_no)
+        ) WITHOUT ROWID;
+        -- a player's history is the union of both indexes; head-to-head is one probe in each
+        CREATE INDEX IF NOT EXISTS results_by_winner ON results (winner_id, loser_id);
+        CREATE INDEX IF NOT EXISTS results_by_loser ON results (loser_id, winner_id);
+        CREATE INDEX IF NOT EXISTS tournaments_by_start ON tournaments (started_at);
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._jobs = queue.Queue()
+        self._player_ids = {}  # name -> players.id, only used by the worker
+        self._thread = threading.Thread(target=self._run, name="tornify-history", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        conn = sqlite3.connect(self.path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(self.schema)
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                break
+            fn, args, on_done, on_error = job
+            try:
+                with conn:
+                    result = fn(conn, *args)
+            except Exception as ex:
+                if on_error is not None:
+                    on_error(ex)
+                else:
+                    print(f"History error: {ex}")
+                continue
+            if on_done is not None:
+                on_done(result)
+        conn.close()
+
+    def submit(self, fn, *args, on_done=None, on_error=None):
+        """Queues fn(connection, *args), run in its own transaction. on_done gets the
+        result and on_error the exception, both on the worker thread."""
+        self._jobs.put((fn, args, on_done, on_error))
+
+    def close(self):
+        """Runs what is queued, then closes the database."""
+        self._jobs.put(None)
+        self._thread.join()
+
+    def _ids(self, conn, names):
+        missing = [name for name in set(names) if name not in self._player_ids]
+        if missing:
+            conn.executemany("INSERT OR IGNORE INTO players (name) VALUES (?)", [(name,) for name in missing])
+            for start in range(0, len(missing), 500):
+                chunk = missing[start:start + 500]
+                marks = ",".join("?" * len(chunk))
+                self._player_ids.update(conn.execute(f"SELECT name, id FROM players WHERE name IN ({marks})", chunk))
+        return self._player_ids
+
+    # writes; `tournament` is a dict the first one fills with the row id for the others
+
+    def begin_tournament(self, tournament, category, seed, entrants, started_at):
+        def begin(conn):
+            cursor = conn.execute(
+                "INSERT INTO tournaments (category, seed, entrants, started_at) VALUES (?, ?, ?, ?)",
+                (category, seed, entrants, started_at),
+            )
+            tournament["id"] = cursor.lastrowid
+        self.submit(begin)
+
+    def record_round(self, tournament, rows):
+        """Stores the matches of a finished round in one transaction. `rows` are
+        (match_no, round, player1, player2, winner, loser, score, walkover, decided_at)
+        with players given by name; stored rows of the same matches are replaced."""
+        def record(conn):
+            ids = self._ids(conn, [name for row in rows for name in row[2:6]])
+            tid = tournament["id"]
+            conn.executemany(
+                "INSERT OR REPLACE INTO matches VALUES (?, ?, ?, ?, ?)",
+                [(tid, row[0], row[1], ids[row[2]], ids[row[3]]) for row in rows],
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(tid, row[0], ids[row[4]], ids[row[5]], row[6], row[7], row[8]) for row in rows],
+            )
+        self.submit(record)
+
+    def forget_results(self, tournament, match_nos):
+        def forget(conn):
+            keys = [(tournament["id"], no) for no in match_nos]
+            conn.executemany("DELETE FROM results WHERE tournament_id = ? AND match_no = ?", keys)
+            conn.executemany("DELETE FROM matches WHERE tournament_id = ? AND match_no = ?", keys)
+        self.submit(forget)
+
+    def crown(self, tournament, name):
+        def crown(conn):
+            champion = self._ids(conn, [name])[name] if name is not None else None
+            conn.execute("UPDATE tournaments SET champion_id = ? WHERE id = ?", (champion, tournament["id"]))
+        self.submit(crown)
+
+    # queries; on_done gets the rows, on_error the exception if the query failed
+
+    def season(self, since, on_done, on_error=None):
+        """Per player over the tournaments started since `since`: name, tournaments,
+        titles, wins and losses, best first."""
+        def season(conn):
+            played = conn.execute(
+                """
+                SELECT player_id, COUNT(DISTINCT tournament_id), SUM(won), COUNT(*) - SUM(won) FROM (
+                    SELECT r.tournament_id, r.winner_id AS player_id, 1 AS won
+                    FROM results r JOIN tournaments t ON t.id = r.tournament_id WHERE t.started_at >= ?1
+                    UNION ALL
+                    SELECT r.tournament_id, r.loser_id, 0
+                    FROM results r JOIN tournaments t ON t.id = r.tournament_id WHERE t.started_at >= ?1
+                ) GROUP BY player_id
+                """,
+                (since,),
+            ).fetchall()
+            titles = dict(conn.execute(
+                "SELECT champion_id, COUNT(*) FROM tournaments WHERE started_at >= ? AND champion_id IS NOT NULL GROUP BY champion_id",
+                (since,),
+            ))
+            names = dict(conn.execute("SELECT id, name FROM players"))
+            rows = [(names[pid], entered, titles.get(pid, 0), wins, losses) for pid, entered, wins, losses in played]
+            rows.sort(key=lambda row: (-row[2], -row[3], row[4], row[0]))
+            return rows
+        self.submit(season, on_done=on_done, on_error=on_error)
+
+    def history(self, name, limit, on_done, on_error=None):
+        """The latest results of a player: (decided_at, round, opponent, won, score, walkover)."""
+        def history(conn):
+            return conn.execute(
+                """
+                SELECT r.decided_at, m.round, p.name, r.won, r.score, r.walkover FROM (
+                    SELECT tournament_id, match_no, loser_id AS opponent_id, 1 AS won, score, walkover, decided_at
+                    FROM results WHERE winner_id = (SELECT id FROM players WHERE name = ?1)
+                    UNION ALL
+                    SELECT tournament_id, match_no, winner_id, 0, score, walkover, decided_at
+                    FROM results WHERE loser_id = (SELECT id FROM players WHERE name = ?1)
+                ) r
+                JOIN matches m ON m.tournament_id = r.tournament_id AND m.match_no = r.match_no
+                JOIN players p ON p.id = r.opponent_id
+                ORDER BY r.decided_at DESC LIMIT ?2
+                """,
+                (name, limit),
+            ).fetchall()
+        self.submit(history, on_done=on_done, on_error=on_error)
+
+    def head_to_head(self, name, opponent, on_done, on_error=None):
+        """(wins of `name`, wins of `opponent`) in their matches against each other."""
+        def head_to_head(conn):
+            ids = dict(conn.execute("SELECT name, id FROM players WHERE name IN (?, ?)", (name, opponent)))
+            if name not in ids or opponent not in ids:
+                return (0, 0)
+            count = "SELECT COUNT(*) FROM results WHERE winner_id = ? AND loser_id = ?"
+            won = conn.execute(count, (ids[name], ids[opponent])).fetchone()[0]
+            lost = conn.execute(count, (ids[opponent], ids[name])).fetchone()[0]
+            return (won, lost)
+        self.submit(head_to_head, on_done=on_done, on_error=on_error)
+
+    def games(self, on_done, exclude=(), on_error=None):
+        """Every stored result in play order: (names by id, winner ids, loser ids),
+        leaving out the tournaments in `exclude` (dicts given to begin_tournament)."""
+        def games(conn):
+            skipped = {tournament.get("id") for tournament in exclude}
+            winners, losers = [], []
+            # the primary key order: tournaments as they started, matches as they were created
+            rows = conn.execute("SELECT tournament_id, winner_id, loser_id FROM results ORDER BY tournament_id, match_no")
+            for tournament_id, winner, loser in rows:
+                if tournament_id in skipped:
+                    continue
+                winners.append(winner)
+                losers.append(loser)
+            return dict(conn.execute("SELECT id, name FROM players")), winners, losers
+        self.submit(games, on_done=on_done, on_error=on_error)
+
+class RatingEngine:
+    """Elo ratings by player name.
+
+    Live results move two ratings at once (update/revert). replay() recomputes the
+    ratings from a whole season: the games are split into layers where no player plays
+    twice, each game one layer past the previous games of both its players, so the
+    layers can be applied one vectorized step at a time and still give the result of
+    playing the games in order.
+    """
+
+    def __init__(self, k=32.0, initial=1500.0, scale=400.0):
+        self.k = k
+        self.initial = initial
+        self.scale = scale
+        self.ratings = {}
+
+    def rating(self, name):
+        return self.ratings.get(name, self.initial)
+
+    def expected(self, name, opponent):
+        """Chance that `name` beats `opponent`."""
+        return 1.0 / (1.0 + 10.0 ** ((self.rating(opponent) - self.rating(name)) / self.scale))
+
+    def update(self, winner, loser):
+        """Applies a result; returns the rating points moved, for revert()."""
+        delta = self.k * (1.0 - self.expected(winner, loser))
+        self.ratings[winner] = self.rating(winner) + delta
+        self.ratings[loser] = self.rating(loser) - delta
+        return delta
+
+    def revert(self, winner, loser, delta):
+        self.ratings[winner] = self.rating(winner) - delta
+        self.ratings[loser] = self.rating(loser) + delta
+
+    def move(self, old, new, points):
+        """Takes rating points won under one name over to another."""
+        self.ratings[old] = self.rating(old) - points
+        self.ratings[new] = self.rating(new) + points
+
+    def replay(self, names, winners, losers):
+        """Ratings by name after playing the games (player ids mapped to names by
+        `names`) in order from the initial rating. The ratings in use are left alone."""
+        index = {}
+        w = [index.setdefault(pid, len(index)) for pid in winners]
+        l = [index.setdefault(pid, len(index)) for pid in losers]
+        last = [0] * len(index)
+        layer = [0] * len(w)
+        for i in range(len(w)):
+            a, b = w[i], l[i]
+            layer[i] = last[a] = last[b] = max(last[a], last[b]) + 1
+        if np is not None:
+            values = self._replay_layers(np.array(w, dtype=np.int64), np.array(l, dtype=np.int64), np.array(layer, dtype=np.int64), len(index))
+        else:
+            values = [self.initial] * len(index)
+            for i in sorted(range(len(w)), key=layer.__getitem__):
+                a, b = w[i], l[i]
+                delta = self.k * (1.0 - 1.0 / (1.0 + 10.0 ** ((values[b] - values[a]) / self.scale)))
+                values[a] += delta
+                values[b] -= delta
+        return {names[pid]: float(values[i]) for pid, i in index.items()}
+
+    def _replay_layers(self, w, l, layer, count):
+        values = np.full(count, self.initial)
+        order = np.argsort(layer, kind="stable")
+        w, l = w[order], l[order]
+        bounds = np.flatnonzero(np.diff(layer[order])) + 1
+        for start, stop in zip(np.concatenate(([0], bounds)), np.concatenate((bounds, [len(w)]))):
+            a, b = w[start:stop], l[start:stop]
+            delta = self.k * (1.0 - 1.0 / (1.0 + 10.0 ** ((values[b] - values[a]) / self.scale)))
+            values[a] += delta
+            values[b] -= delta
+        return values
+
+class Standings:
+    """Places of every entrant of a bracket, kept in order as results come in.
+
+    A result in a round of m matches of a bracket playing out places base+1 and on
+    puts its winner in base+1..base+m and its loser in base+m+1..base+2m. Later
+    results only narrow that range, so a player is ranked by the narrowest range of
+    their results, then by more wins, fewer losses, higher rating and name.
+    """
+
+    def __init__(self, players, rating):
+        self.rating = rating
+        self.entrants = len(players)
+        self.players = {p.id: p for p in players}
+        self.ranges = {p.id: {} for p in players}  # player id -> {match id: (first, last)}
+        self.keys = {}
+        self.order = []
+        self.rebuild()
+
+    def _key(self, player):
+        top = self.entrants
+        ranges = [(min(first, top), min(last, top)) for first, last in self.ranges[player.id].values()]
+        first, last = min(ranges, key=lambda r: r[1] - r[0]) if ranges else (1, top)
+        return (first, last, -player.score, player.losses, -self.rating(player.name), normalize_name(player.name), player.id)
+
+    def _place(self, player):
+        old = self.keys.get(player.id)
+        if old is not None:
+            del self.order[bisect.bisect_left(self.order, old)]
+        key = self.keys[player.id] = self._key(player)
+        bisect.insort(self.order, key)
+
+    def rebuild(self):
+        """Sorts everyone again, after changes the results do not report (ratings, names)."""
+        self.keys = {pid: self._key(player) for pid, player in self.players.items()}
+        self.order = sorted(self.keys.values())
+
+    def add(self, player):
+        """Adds a late entry. There is one more place to end in, so every range that ran
+        up to the old last place now runs up to the new one."""
+        self.entrants += 1
+        self.players[player.id] = player
+        self.ranges[player.id] = {}
+        self.rebuild()
+
+    def credit(self, match_id, winner, loser, base, matches):
+        """Counts a result of a round of `matches` matches in a bracket below place `base`.
+        The ranges are kept as played and clamped to the entrants when ranked."""
+        self.ranges[winner.id][match_id] = (base + 1, base + matches)
+        self.ranges[loser.id][match_id] = (base + matches + 1, base + 2 * matches)
+        self._place(winner)
+        self._place(loser)
+
+    def uncredit(self, match_id, winner, loser):
+        self.ranges[winner.id].pop(match_id, None)
+        self.ranges[loser.id].pop(match_id, None)
+        self._place(winner)
+        self._place(loser)
+
+    def rows(self, limit=None):
+        """(place, player, first, last) from the top, where first..last are the places
+        the player can still end in."""
+        for place, key in enumerate(self.order[:limit] if limit is not None else self.order, 1):
+            yield place, self.players[key[-1]], key[0], key[1]
+
+    def records(self):
+        for place, player, first, last in self.rows():
+            yield {
+                "place": place,
+                "places": f"{first}-{last}" if last != first else str(first),
+                "name": player.name,
+                "wins": player.score,
+                "losses": player.losses,
+                "rating": round(self.rating(player.name)),
+                "withdrawn": player.withdrawn,
+            }
+
+    def export_csv(self, path):
+        fields = ["place", "places", "name", "wins", "losses", "rating", "withdrawn"]
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=fields)
+            writer.writeheader()
+            writer.writerows(self.records())
+
+    def export_json(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(list(self.records()), f, indent=2, ensure_ascii=False)
+
+class CourtScheduler:
+    """Calls ready matches to courts.
+
+    A match is ready once both players are known and it has no winner. Ready matches
+    wait in a heap by priority (round, then bracket order) and go to the lowest free
+    court as soon as both players have rested `rest` seconds since their last match;
+    those held back only by rest wait in a second heap by the time they may start.
+    Matches that stop being ready leave stale heap entries, skipped when they reach
+    the top, so every result and call costs O(log n).
+    """
+
+    def __init__(self, courts, duration, rest):
+        self.courts = courts
+        self.duration = duration  # estimated seconds per game
+        self.rest = rest
+        self.free = list(range(courts))
+        self.playing = {}  # court -> (match, called at, players)
+        self.court_of = {}  # match id -> court
+        self.queued = {}  # match id -> (match, priority, token) while waiting for a court
+        self.ready = []  # (priority, token, match id)
+        self.resting = []  # (may start at, priority, token, match id)
+        self.rest_until = {}  # player id -> time
+        self.finished = set()  # ids of the matches played out on a court
+        self.first_call = None
+        self._tokens = 0
+
+    def estimate(self, match):
+        return self.duration * (match.best_of + 1) / 2
+
+    def update(self, match, ready, priority, now):
+        """Takes in the state of a match after a result or a change of players."""
+        if match.winner is None:
+            # an undone result no longer counts as played
+            self.finished.discard(match.id)
+        court = self.court_of.get(match.id)
+        if court is not None:
+            _, _, played = self.playing[court]
+            if ready and played == (match.get_player1(), match.get_player2()):
+                return
+            # the result is in, the match was undone or its players changed: the court is
+            # free again, and a match still ready goes back in the queue below
+            del self.court_of[match.id]
+            del self.playing[court]
+            heapq.heappush(self.free, court)
+            if match.winner is not None:
+                self.finished.add(match.id)
+                for player in played:
+                    self.rest_until[player.id] = now + self.rest
+        if match.id in self.queued:
+            if not ready:
+                del self.queued[match.id]
+        elif ready:
+            self._tokens += 1
+            self.queued[match.id] = (match, priority, self._tokens)
+            heapq.heappush(self.ready, (priority, self._tokens, match.id))
+
+    def _current(self, token, match_id):
+        entry = self.queued.get(match_id)
+        return entry if entry is not None and entry[2] == token else None
+
+    def dispatch(self, now):
+        """Calls ready matches to the free courts; returns the (court, match) calls made."""
+        while self.resting and self.resting[0][0] <= now:
+            _, priority, token, match_id = heapq.heappop(self.resting)
+            if self._current(token, match_id) is not None:
+                heapq.heappush(self.ready, (priority, token, match_id))
+        calls = []
+        while self.free and self.ready:
+            priority, token, match_id = heapq.heappop(self.ready)
+            entry = self._current(token, match_id)
+            if entry is None:
+                continue
+            match = entry[0]
+            players = (match.get_player1(), match.get_player2())
+            available = max(self.rest_until.get(player.id, 0.0) for player in players)
+            if available > now:
+                heapq.heappush(self.resting, (available, priority, token, match_id))
+                continue
+            court = heapq.heappop(self.free)
+            del self.queued[match_id]
+            self.court_of[match_id] = court
+            self.playing[court] = (match, now, players)
+            if self.first_call is None:
+                self.first_call = now
+            calls.append((court, match))
+        return calls
+
+    def next_wakeup(self):
+        """When the next match held back by rest may start, if any."""
+        while self.resting and self._current(self.resting[0][2], self.resting[0][3]) is None:
+            heapq.heappop(self.resting)
+        return self.resting[0][0] if self.resting else None
+
+    def call_list(self, now, upcoming=6):
+        """(court, match, start, end) on court now, then the next `upcoming` matches
+        with the court and times they are expected to get."""
+        rows = []
+        projected = []
+        for court, (match, called, _) in sorted(self.playing.items()):
+            end = called + self.estimate(match)
+            rows.append((court, match, called, end))
+            projected.append((max(now, end), court))
+        projected.extend((now, court) for court in self.free)
+        heapq.heapify(projected)
+        waiting = [(priority, token, match_id) for match_id, (_, priority, token) in self.queued.items()]
+        for priority, token, match_id in heapq.nsmallest(upcoming, waiting):
+            if not projected:
+                break
+            match = self.queued[match_id][0]
+            free_at, court = heapq.heappop(projected)
+            start = max(free_at, *(self.rest_until.get(p.id, 0.0) for p in (match.get_player1(), match.get_player2())))
+            end = start + self.estimate(match)
+            rows.append((court, match, start, end))
+            heapq.heappush(projected, (end, court))
+        return rows
+
+    def per_hour(self, now):
+        if self.first_call is None or now <= self.first_call:
+            return 0.0
+        return len(self.finished) * 3600 / (now - self.first_call)
+
+class ResultLog:
+    """Timestamped winner changes of a bracket, for replaying how it evolved.
+
+    The winner of every match is kept as a player id (-1 for none), and a copy of
+    that state is kept every `keyframe_every` events, so the state after any event
+    is a keyframe plus fewer than `keyframe_every` events.
+    """
+
+    def __init__(self, winners, keyframe_every):
+        self.keyframe_every = keyframe_every
+        self.current = array("i", winners)
+        self.keyframes = [array("i", self.current)]
+        self.times = array("d")
+        self.match_ids = array("i")
+        self.winner_ids = array("i")
+
+    def __len__(self):
+        return len(self.match_ids)
+
+    def observe(self, match, now):
+        winner = match.winner.id if match.winner is not None else -1
+        if self.current[match.id] == winner:
+            return
+        self.current[match.id] = winner
+        self.times.append(now)
+        self.match_ids.append(match.id)
+        self.winner_ids.append(winner)
+        if len(self.match_ids) % self.keyframe_every == 0:
+            self.keyframes.append(array("i", self.current))
+
+    def winners_at(self, count, match_ids):
+        """Winner ids of just `match_ids` after the first `count` events: the keyframe
+        is read, not copied, so this costs fewer than keyframe_every events plus
+        one lookup per match."""
+        start = count // self.keyframe_every * self.keyframe_every
+        keyframe = self.keyframes[count // self.keyframe_every]
+        later = {}
+        for i in range(start, count):
+            later[self.match_ids[i]] = self.winner_ids[i]
+        return {match_id: later.get(match_id, keyframe[match_id]) for match_id in match_ids}
+
+    def touched(self, start, stop):
+        """Ids of the matches whose winner changed between two event counts."""
+        return set(self.match_ids[start:stop])
+
+class Profiler:
+    """Opt-in timing of the hot paths.
+
+    While disabled, a timed function costs a single attribute check. Enable it
+    with TORNIFY_PROFILE=1 or by opening the performance HUD (F12).
+    """
+
+    max_samples = 5000
+
+    def __init__(self):
+        self.enabled = os.environ.get("TORNIFY_PROFILE") == "1"
+        self.counts = defaultdict(int)
+        self.totals = defaultdict(float)
+        self.samples = defaultdict(lambda: deque(maxlen=self.max_samples))
+        self.values = defaultdict(lambda: deque(maxlen=self.max_samples))
+        self.value_totals = defaultdict(int)
+        self.gauges = {}
+
+    def timed(self, name):
+        def decorator(fn):
+            if asyncio.iscoroutinefunction(fn):
+                @functools.wraps(fn)
+                async def async_wrapper(*args, **kwargs):
+                    if not self.enabled:
+                        return await fn(*args, **kwargs)
+                    start = time.perf_counter()
+                    try:
+                        return await fn(*args, **kwargs)
+                    finally:
+                        self.record(name, time.perf_counter() - start)
+                return async_wrapper
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self.record(name, time.perf_counter() - start)
+            return wrapper
+        return decorator
+
+    def record(self, name, seconds):
+        self.counts[name] += 1
+        self.totals[name] += seconds
+        self.samples[name].append(seconds)
+
+    def record_value(self, name, value):
+        self.value_totals[name] += value
+        self.values[name].append(value)
+
+    def gauge(self, name, value):
+        self.gauges[name] = value
+
+    def reset(self):
+        self.counts.clear()
+        self.totals.clear()
+        self.samples.clear()
+        self.values.clear()
+        self.value_totals.clear()
+        self.gauges.clear()
+
+    def stats(self):
+        result = {}
+        for name in sorted(self.counts):
+            ordered = sorted(self.samples[name])
+            result[name] = {
+                "count": self.counts[name],
+                "total_ms": self.totals[name] * 1000,
+                "p50_ms": ordered[int(0.50 * (len(ordered) - 1))] * 1000 if ordered else 0.0,
+                "p99_ms": ordered[int(0.99 * (len(ordered) - 1))] * 1000 if ordered else 0.0,
+            }
+        return result
+
+    def value_stats(self):
+        result = {}
+        for name in sorted(self.values):
+            ordered = sorted(self.values[name])
+            result[name] = {
+                "count": len(ordered),
+                "total": self.value_totals[name],
+                "p50": ordered[int(0.50 * (len(ordered) - 1))] if ordered else 0,
+                "p99": ordered[int(0.99 * (len(ordered) - 1))] if ordered else 0,
+            }
+        return result
+
+    def format(self):
+        lines = [f"{'':<22}{'n':>6}{'total':>10}{'p50':>9}{'p99':>9}"]
+        for name, st in self.stats().items():
+            lines.append(f"{name:<22}{st['count']:>6}{st['total_ms']:>10.1f}{st['p50_ms']:>9.2f}{st['p99_ms']:>9.2f}")
+        for name, st in self.value_stats().items():
+            lines.append(f"{name:<22}{st['count']:>6}{st['total']:>10}{st['p50']:>9}{st['p99']:>9}")
+        for name, value in sorted(self.gauges.items()):
+            lines.append(f"{name:<22}{value:>6}")
+        return "\n".join(lines)
+
+    def dump(self, path, extra=None):
+        data = {
+            "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "stats": self.stats(),
+            "values": self.value_stats(),
+            "gauges": dict(self.gauges),
+        }
+        if extra:
+            data.update(extra)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        return path
+
+def slot_metrics(scale):
+    text_size = max(6, int(14 * scale))
+    cont_width = max(60, int(150 * scale))
+    cont_height = max(20, int(40 * scale))  # Fixed height to ensure same size
+    padding_value = max(2, int(10 * scale))
+    return text_size, cont_width, cont_height, padding_value
+
+class BracketLayout:
+    """Absolute geometry of a bracket rendered at one scale, in pixels.
+
+    Boxes are (x, y, width, height) tuples. `matches` maps a match id to its
+    cell, `slots` maps (match id, side) to the player slot inside that cell,
+    `connectors` holds the lines feeding every match, grouped by round, and
+    `headers` holds one box per round. Placement brackets are drawn below the
+    main one: `section_headers` holds their (places, box) titles and
+    `placement_connectors` all of their lines.
+    """
+    __slots__ = ("scale", "width", "height", "matches", "slots", "connectors", "headers",
+                 "third_place_header", "third_place_box", "stroke_width", "corner_radius", "slot_size",
+                 "slot_gap", "section_headers", "placement_connectors", "_columns")
+
+    def __init__(self, scale):
+        self.scale = scale
+        self.width = 0
+        self.height = 0
+        self.matches = {}
+        self.slots = {}
+        self.connectors = []
+        self.headers = []
+        self.third_place_header = None
+        self.third_place_box = None
+        self.section_headers = []
+        self.placement_connectors = []
+        self.stroke_width = max(1, int(2 * scale))
+        self.corner_radius = max(4, int(10 * scale))
+        _, cont_width, cont_height, _ = slot_metrics(scale)
+        self.slot_size = (cont_width, cont_height)
+        self.slot_gap = max(6, int(10 * scale))
+        self._columns = None
+
+    def place_slots(self, match):
+        """(Re)places the player slots of a match inside its cell, one per side it has."""
+        x, y, w, h = self.matches[match.id]
+        slot_w, slot_h = self.slot_size
+        sides = [side for side, present in enumerate((
+            match.player1 is not None or match.previous1 is not None,
+            match.player2 is not None or match.previous2 is not None,
+        )) if present]
+        total = len(sides) * slot_h + max(0, len(sides) - 1) * self.slot_gap
+        slot_x = x + (w - slot_w) / 2
+        slot_y = y + h / 2 - total / 2
+        for side in (0, 1):
+            self.slots.pop((match.id, side), None)
+        for side in sides:
+            self.slots[(match.id, side)] = (slot_x, slot_y, slot_w, slot_h)
+            slot_y += slot_h + self.slot_gap
+
+    def _column_index(self):
+        # cells grouped by column and sorted by top edge, for bisection
+        columns = {}
+        for match_id, (mx, my, mw, mh) in self.matches.items():
+            columns.setdefault((mx, mw), []).append((my, mh, match_id))
+        self._columns = [(x, w, sorted(cells)) for (x, w), cells in columns.items()]
+        return self._columns
+
+    def match_at(self, x, y):
+        for cx, cw, cells in self._columns or self._column_index():
+            if not cx <= x < cx + cw:
+                continue
+            i = bisect.bisect_right(cells, (y, float("inf"))) - 1
+            if i >= 0:
+                cy, ch, match_id = cells[i]
+                if y < cy + ch:
+                    return match_id
+        return None
+
+    def slot_at(self, x, y):
+        """(match id, side) of the player slot under the point, or None."""
+        match_id = self.match_at(x, y)
+        if match_id is None:
+            return None
+        for side in (0, 1):
+            box = self.slots.get((match_id, side))
+            if box is not None and box[0] <= x < box[0] + box[2] and box[1] <= y < box[1] + box[3]:
+                return match_id, side
+        return None
+
+def compute_bracket_layout(rounds_list, third_place_match, scale, metrics, hidden=frozenset(), placements=()):
+    """Places every match, connector and the third-place box of the bracket.
+
+    Leaves are stacked top to bottom and every later match is centered on the
+    matches that feed it, so the geometry only depends on the match graph.
+    Matches in `hidden` (collapsed byes) get no box; a match fed only by hidden
+    matches takes a row of its own, so the bracket only grows with drawn matches.
+    The `placements` groups (see placement_brackets) follow below the main
+    bracket, each under a title row, in the columns of the rounds they follow.
+    """
+    layout = BracketLayout(scale)
+    round_col_width = int(metrics["base_round_col_width"] * scale)
+    fixed_box_width = int(metrics["base_fixed_box_width"] * scale)
+    connector_w = int(metrics["base_connector_width"] * scale)
+    base_match_height = int(metrics["base_match_height"] * scale)
+    spacing = int(metrics["base_spacing"] * scale)
+    num_rounds = len(rounds_list)
+    header_height = int(22 * scale)
+    top = header_height + spacing
+
+    cell_heights = [base_match_height]
+    for _ in range(1, num_rounds - 1):
+        cell_heights.append(cell_heights[-1] * 2 + spacing)
+    if num_rounds > 1:
+        cell_heights.append(cell_heights[-1])
+    if hidden:
+        # rows no longer double per round, so taller cells would overlap their neighbours
+        cell_heights = [base_match_height] * len(cell_heights)
+
+    # row of every drawn match, in bracket order: a match without drawn feeds takes the
+    # next row, any other sits at the mean row of its feeds
+    rows = {}
+    num_rows = 0
+
+    def assign_rows(finals):
+        nonlocal num_rows
+        pending = [(match, False) for match in reversed(finals)]
+        while pending:
+            match, expanded = pending.pop()
+            feeds = [] if match.use_losers else [
+                prev for prev in (match.previous1, match.previous2) if prev is not None and prev.id not in hidden
+            ]
+            if feeds and not expanded:
+                pending.append((match, True))
+                pending.extend((prev, False) for prev in reversed(feeds))
+            elif feeds:
+                rows[match.id] = sum(rows[prev.id] for prev in feeds) / len(feeds)
+            else:
+                rows[match.id] = num_rows
+                num_rows += 1
+
+    if rounds_list:
+        assign_rows(rounds_list[-1])
+
+    centers = {}
+    for level, round_matches in enumerate(rounds_list):
+        x = level * (round_col_width + connector_w)
+        layout.headers.append((x, 0, round_col_width, header_height))
+        cell_height = cell_heights[level]
+        round_connectors = []
+        for match in round_matches:
+            if match.id in hidden:
+                continue
+            center_y = top + rows[match.id] * (base_match_height + spacing) + base_match_height / 2
+            if level > 0:
+                feeds = [centers[prev.id] for prev in (match.previous1, match.previous2) if prev is not None and prev.id in centers]
+                conn_x = x - connector_w
+                if len(feeds) == 2:
+                    round_connectors.append(("bracket", conn_x, feeds[0], feeds[1], center_y, connector_w))
+                elif feeds:
+                    round_connectors.append(("line", conn_x, feeds[0], connector_w))
+            centers[match.id] = center_y
+            layout.matches[match.id] = (x, center_y - cell_height / 2, round_col_width, cell_height)
+            layout.place_slots(match)
+        layout.connectors.append(round_connectors)
+
+    # placement brackets: a title row, then the group laid out like the main bracket
+    # with every cell one row tall
+    pitch = base_match_height + spacing
+    for places, column, group_rounds in placements:
+        title_row = num_rows
+        num_rows += 1
+        assign_rows(group_rounds[-1])
+        x = column * (round_col_width + connector_w)
+        layout.section_headers.append((places, (x, top + title_row * pitch + base_match_height - header_height, round_col_width, header_height)))
+        for offset, round_matches in enumerate(group_rounds):
+            x = (column + offset) * (round_col_width + connector_w)
+            for match in round_matches:
+                center_y = top + rows[match.id] * pitch + base_match_height / 2
+                if offset > 0:
+                    feeds = [centers[prev.id] for prev in (match.previous1, match.previous2)]
+                    layout.placement_connectors.append(("bracket", x - connector_w, feeds[0], feeds[1], center_y, connector_w))
+                centers[match.id] = center_y
+                layout.matches[match.id] = (x, center_y - base_match_height / 2, round_col_width, base_match_height)
+                layout.place_slots(match)
+
+    width = num_rounds * round_col_width + max(0, num_rounds - 1) * connector_w
+    if third_place_match is not None:
+        x = width + connector_w
+        champion_height = cell_heights[-1] if cell_heights else base_match_height
+        box_height = max(int(base_match_height * 2 + spacing), int(champion_height))
+        header_h = int(16 * scale * 1.4)
+        box_y = header_h + int(10 * scale)
+        layout.third_place_header = (x, 0, fixed_box_width, header_h)
+        layout.third_place_box = (x, box_y, fixed_box_width, box_height)
+        center_y = box_y + box_height / 2
+        layout.matches[third_place_match.id] = (x + (fixed_box_width - round_col_width) / 2, center_y - base_match_height / 2, round_col_width, base_match_height)
+        layout.place_slots(third_place_match)
+        width += connector_w + fixed_box_width
+    layout.width = width + int(80 * scale)
+
+    layout.height = max(
+        int(num_rows * base_match_height + max(0, num_rows - 1) * spacing + 100 * scale),
+        int(600 * scale),
+    )
+    return layout
+
+def connector_elements(layout, round_connectors):
+    """Flattens the connectors of one round into the elements of a single canvas path."""
+    radius = layout.corner_radius
+    elements = []
+    for connector in round_connectors:
+        if connector[0] == "line":
+            _, x0, y, w = connector
+            elements.append(cv.Path.MoveTo(x0, y))
+            elements.append(cv.Path.LineTo(x0 + w, y))
+            continue
+        _, x0, top, bottom, middle, w = connector
+        half_w = x0 + w / 2
+        elements.extend([
+            cv.Path.MoveTo(x0, top),
+            cv.Path.LineTo(half_w - radius, top),
+            cv.Path.QuadraticTo(half_w, top, half_w, top + radius),
+            cv.Path.LineTo(half_w, bottom - radius),
+            cv.Path.QuadraticTo(half_w, bottom, half_w - radius, bottom),
+            cv.Path.LineTo(x0, bottom),
+            cv.Path.MoveTo(half_w, middle),
+            cv.Path.LineTo(x0 + w, middle),
+        ])
+    return elements
+
+class MiniMap:
+    """Whole bracket drawn on one small canvas, with the visible region outlined.
+
+    Matches are merged into buckets a couple of pixels tall per round column, so the
+    number of shapes depends on the map size and not on the number of players.
+    """
+    min_bucket_px = 2
+
+    def __init__(self, width=180, height=240):
+        self.width = width
+        self.height = height
+        self.viewport = cv.Rect(0, 0, 0, 0, paint=ft.Paint(style=ft.PaintingStyle.STROKE, stroke_width=2))
+        self.canvas = cv.Canvas(shapes=[], width=width, height=height)
+        self.palette = (ft.Colors.GREY_400, ft.Colors.GREEN)
+        self.kx = self.ky = 1.0
+        self.bucket_of = {}  # match id -> bucket index
+        self.buckets = []  # [shape, decided, total, last color]
+        self.decided = {}  # match id -> whether it had a winner when last drawn
+        self.source = None
+
+    def build(self, layout, source=None):
+        """Lays the buckets out from a BracketLayout; all matches start undecided."""
+        self.source = source
+        self.kx = self.width / max(1, layout.width)
+        self.ky = self.height / max(1, layout.height)
+        columns = {}
+        for match_id, (x, y, w, h) in layout.matches.items():
+            row = int(y * self.ky // self.min_bucket_px)
+            columns.setdefault((x, w, row), []).append((match_id, y, h))
+        self.bucket_of.clear()
+        self.decided.clear()
+        self.buckets = []
+        for (x, w, row), members in sorted(columns.items()):
+            top = min(y for _, y, _ in members) * self.ky
+            bottom = max(y + h for _, y, h in members) * self.ky
+            # leave the connector gap between columns visible
+            shape = cv.Rect(x * self.kx, top, max(1.0, w * self.kx * 0.85), max(1.0, bottom - top - 0.5),
+                            paint=ft.Paint(color=self.palette[0], style=ft.PaintingStyle.FILL))
+            index = len(self.buckets)
+            self.buckets.append([shape, 0, len(members), self.palette[0]])
+            for match_id, _, _ in members:
+                self.bucket_of[match_id] = index
+                self.decided[match_id] = False
+        self.canvas.shapes = [bucket[0] for bucket in self.buckets] + [self.viewport]
+
+    def _bucket_color(self, bucket):
+        pending, done = self.palette
+        if bucket[1] == 0:
+            return pending
+        if bucket[1] == bucket[2]:
+            return done
+        return ft.Colors.with_opacity(round(0.35 + 0.5 * bucket[1] / bucket[2], 2), done)
+
+    def _paint(self, bucket, changed):
+        color = self._bucket_color(bucket)
+        if color != bucket[3]:
+            bucket[3] = color
+            bucket[0].paint = ft.Paint(color=color, style=ft.PaintingStyle.FILL)
+            changed.append(bucket[0])
+
+    def mark(self, match_id, decided):
+        """Records whether the match has a winner; returns the shapes that changed."""
+        if self.decided.get(match_id, decided) == decided:
+            return []
+        self.decided[match_id] = decided
+        bucket = self.buckets[self.bucket_of[match_id]]
+        bucket[1] += 1 if decided else -1
+        changed = []
+        self._paint(bucket, changed)
+        return changed
+
+    def set_palette(self, pending, done, outline):
+        """Recolors every bucket for a new theme; returns the shapes that changed."""
+        self.palette = (pending, done)
+        changed = []
+        for bucket in self.buckets:
+            self._paint(bucket, changed)
+        if self.viewport.paint.color != outline:
+            self.viewport.paint = ft.Paint(color=outline, style=ft.PaintingStyle.STROKE, stroke_width=2)
+            changed.append(self.viewport)
+        return changed
+
+    def show_viewport(self, x, y, width, height):
+        """Outlines the visible bracket region, given in unscaled bracket coordinates."""
+        rect = self.viewport
+        box_w = max(2.0, min(self.width, width * self.kx))
+        box_h = max(2.0, min(self.height, height * self.ky))
+        box = (
+            max(0.0, min(self.width - box_w, x * self.kx)),
+            max(0.0, min(self.height - box_h, y * self.ky)),
+            box_w,
+            box_h,
+        )
+        if (rect.x, rect.y, rect.width, rect.height) == box:
+            return []
+        rect.x, rect.y, rect.width, rect.height = box
+        return [rect]
+
+    def to_bracket(self, x, y):
+        """Unscaled bracket coordinates of a point on the map."""
+        return x / self.kx, y / self.ky
+
+
+class SlotView:
+    """Controls of one rendered player slot and the last state written to them."""
+    __slots__ = ("text", "container", "rendered")
+
+    def __init__(self, text, container):
+        self.text = text
+        self.container = container
+        self.rendered = None
+
+class MatchView:
+    """Rendered widget state of a match: one SlotView per side (None when the side is empty)."""
+    __slots__ = ("slots", "scale", "widget")
+
+    def __init__(self, scale):
+        self.slots = [None, None]
+        self.scale = scale
+        self.widget = None
+
+class LodView:
+    """Lightweight, non-interactive stand-in for a match widget at low zoom levels."""
+    __slots__ = ("mode", "widget", "text", "scale", "rendered", "slots")
+
+    def __init__(self, mode, widget, text, scale):
+        self.mode = mode
+        self.widget = widget
+        self.text = text
+        self.scale = scale
+        self.rendered = None
+        self.slots = (None, None)
+
+def truncate_name(name, max_chars):
+    return name if len(name) <= max_chars else name[:max(1, max_chars - 1)] + "…"
+
+class RenderScheduler:
+    """Coalesces page updates.
+
+    Every request made while an action (a user event handler) is running is
+    flushed once, when the outermost action finishes. Flet runs handlers on a
+    thread pool, so each thread nests its own actions and collects its own
+    requests. Requests made outside of an action (async tasks, drag hover
+    feedback) are flushed on the next animation frame.
+    """
+
+    frame_interval = 1 / 60
+
+    def __init__(self, page):
+        self.page = page
+        self._lock = threading.RLock()
+        self._local = threading.local()
+        self._frame_batch = self._new_batch()
+        self._frame_pending = False
+        self.runs = defaultdict(int)
+        self.flushes = defaultdict(int)
+        self.requests = defaultdict(int)
+
+    @staticmethod
+    def _new_batch():
+        return {"full": False, "controls": [], "ids": set()}
+
+    def _state(self):
+        """(depth, action name, batch) of the calling thread; the batch is the frame's
+        outside of an action."""
+        local = self._local
+        depth = getattr(local, "depth", 0)
+        if depth == 0:
+            return 0, None, self._frame_batch
+        return depth, local.action, local.batch
+
+    def request(self, *controls):
+        """Marks the given controls (or the whole page when none are given) as dirty."""
+        schedule = False
+        depth, action, batch = self._state()
+        with self._lock:
+            if not controls:
+                batch["full"] = True
+            elif not batch["full"]:
+                for control in controls:
+                    if id(control) not in batch["ids"]:
+                        batch["ids"].add(id(control))
+                        batch["controls"].append(control)
+            self.requests[action or "frame"] += 1
+            if depth == 0 and not self._frame_pending:
+                self._frame_pending = True
+                schedule = True
+        if schedule:
+            self.page.run_task(self._frame)
+
+    async def _frame(self):
+        await asyncio.sleep(self.frame_interval)
+        with self._lock:
+            self._frame_pending = False
+        self.flush()
+
+    @contextmanager
+    def action(self, name):
+        local = self._local
+        depth = getattr(local, "depth", 0)
+        if depth == 0:
+            local.action = name
+            local.batch = self._new_batch()
+            with self._lock:
+                self.runs[name] += 1
+        local.depth = depth + 1
+        try:
+            yield
+        finally:
+            local.depth = depth
+            if depth == 0:
+                try:
+                    self._send(name, local.batch)
+                finally:
+                    local.action = None
+                    local.batch = None
+
+    def batched(self, name):
+        """Decorator that runs an event handler as a single action."""
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.action(name):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def flush(self):
+        """Sends every pending change of the running action (or of the frame) right now."""
+        _, action, batch = self._state()
+        self._send(action, batch)
+
+    def _send(self, action, batch):
+        with self._lock:
+            if not batch["full"] and not batch["controls"]:
+                return
+            full, dirty = batch["full"], batch["controls"]
+            batch.update(full=False, controls=[], ids=set())
+        if not full:
+            # controls never sent need their parent sent too; removed ones are skipped
+            if any(c.uid is None for c in dirty):
+                full = True
+            else:
+                dirty = [c for c in dirty if c.page is not None]
+                if not dirty:
+                    return
+        with self._lock:
+            self.flushes[action or "frame"] += 1
+        # sent outside the lock: another thread's requests must not wait on the client
+        if full:
+            self.page.update()
+        else:
+            self.page.update(*dirty)
+
+    def stats(self):
+        return {
+            name: {"runs": self.runs[name], "requests": self.requests[name], "flushes": self.flushes[name]}
+            for name in sorted(set(self.runs) | set(self.flushes))
+        }
+
+    def summary(self):
+        names = sorted(set(self.runs) | set(self.flushes), key=lambda n: -self.flushes[n])
+        lines = []
+        for name in names:
+            runs = self.runs[name]
+            flushes = self.flushes[name]
+            per_run = flushes / runs if runs else float(flushes)
+            lines.append(f"{name}: {runs} runs, {self.requests[name]} requests, {flushes} flushes ({per_run:.2f}/run)")
+        return "\n".join(lines)
+
 def main(page: ft.Page):
     page.title = "Tornify"
     page.theme_mode = ft.ThemeMode.LIGHT
@@ -90,6 +1568,14 @@ def main(page: ft.Page):
     page.window.icon = "assets/trophy.png"
     page.update()
 
+    # Every handler runs as one scheduler action, so the page is sent once per user action
+    scheduler = RenderScheduler(page)
+    batched = scheduler.batched
+    request_update = scheduler.request
+
+    profiler = Profiler()
+    timed = profiler.timed
+
     players = []  # Lista para armazenar os jogadores
     player_id_counter = [0]
     edit_mode = False  # Modo de edição desligado inicialmente
@@ -98,7 +1584,9 @@ def main(page: ft.Page):
     theme_vars = {}
     bottom_part = None  # Will be defined later
     connector_canvases = []
-    dragging = [None]
+    # drag in progress: source match, dragged player and the legal drop targets,
+    # computed once when the drag starts
+    drag_state = {"source": None, "player": None, "targets": {}, "hover": None}
     bracket_row = None
     
     # Referências para controle de layout e zoom
@@ -112,16 +1600,85 @@ def main(page: ft.Page):
     # Third-place rectangle reference so we can update theme live
     third_place_rectangle = [None]  # container reference
 
+    # Bracket controls kept between renders, keyed by their position in the bracket
+    render_pool = {}
+    render_pool_key = [None]
+    # BracketLayout of the bracket on screen per (drill root, zoom level)
+    layout_cache = {}
+    band_size = 64
+
+    # name that follows the pointer while a player is dragged
+    drag_ghost = ft.Container(
+        content=ft.Text("", size=14, color=ft.Colors.WHITE),
+        padding=ft.padding.symmetric(horizontal=12, vertical=6),
+        border_radius=20,
+        bgcolor=ft.Colors.with_opacity(0.85, ft.Colors.BLUE_GREY_700),
+        visible=False,
+    )
+
+    # name -> player -> current match, rebuilt lazily on the first search of a tournament
+    player_index = PlayerIndex()
+    player_index_stale = [True]
+
+    # bracket being built in the background; cancelled by flagging its token
+    build_state = {"token": None}
+    build_chunk = 512  # matches created or rendered between two yields to the event loop
+
+    # Overview of the whole bracket; the visible region follows the scroll offsets
+    minimap = MiniMap()
+    bracket_scroll = {"column": None, "x": 0.0, "y": 0.0, "width": None, "height": None}
+
     # Zoom related variables (affect only the tournament bracket container)
     zoom_factor = {"value": 1.0}  # wrapped in dict to allow closures to modify
     min_zoom = 0.5
     max_zoom = 2.5
     zoom_step = 0.1
 
+    # Level of detail: below these zoom levels matches are drawn as lightweight boxes
+    # ("compact") or plain colored bars ("bars"); only the focused region keeps full controls.
+    lod_thresholds = {"compact": 0.8, "bars": 0.6}
+    lod_focus = {"value": None}  # match id picked by tapping a lightweight box
+
     # Keep rounds_list for re-rendering at different zoom levels
     rounds_list_global = {"value": None}
     third_place_match_global = {"value": None}
     champion_match_global = {"value": None}
+    # loser-fed placement brackets below the main one (besides the third-place match)
+    placements_global = {"value": ()}
+    # MatchGraph of all_matches: the order every refresh and result propagation follows
+    match_graph_global = {"value": None}
+    # Standings of the bracket, updated with every credited result
+    standings_global = {"value": None}
+    # CourtScheduler of the bracket when courts are set up; fed by every refresh
+    courts_global = {"value": None}
+    court_ticker = {"running": False}
+    # ResultLog of the bracket; while replaying, the bracket on screen shows the state
+    # after `position` events and takes no results
+    result_log_global = {"value": None}
+    replay_state = {"active": False, "position": 0, "players": {}, "saved": None}
+
+    # Categories run side by side, each with its own players and match state. The
+    # brackets of the categories off screen stay mounted (hidden) so switching back is
+    # a visibility change, within a budget of controls; past it they are rendered again.
+    categories = {"active": "Geral", "saved": {}}
+    render_cache = RenderCache(max_controls=120000)
+
+    # Optional local history of players and results, in the SQLite file named by
+    # TORNIFY_HISTORY. `tournament` is the row being written for the category on screen,
+    # `round_of` maps a match id to its round, and a round is written once all of its
+    # playable matches (`playable`) are decided (`decided`); `flushed` rounds are then
+    # only updated match by match.
+    history_path = os.environ.get("TORNIFY_HISTORY")
+    history = HistoryStore(history_path) if history_path else None
+    # Elo ratings by name: moved live by each result, replayed from the history on start
+    # and whenever the K factor changes
+    ratings = RatingEngine()
+    history_state = {"tournament": None, "round_of": None, "rounds": None, "playable": None, "decided": None, "flushed": None}
+
+    # Drill-down: when root is set only the subtree feeding that match is rendered,
+    # with its own zoom; the main zoom is restored when leaving it. `shown` holds the ids
+    # of the matches the last render drew, the only ones that can have a view
+    drill = {"root": None, "rounds": None, "main_zoom": 1.0, "zooms": {}, "shown": None}
 
     # Create confetti canvas at the beginning
     confetti_canvas = cv.Canvas(shapes=[], expand=True)
@@ -133,6 +1690,7 @@ def main(page: ft.Page):
         nonlocal animating, confettis
         animating = True
         while confettis:
+            frame_start = time.perf_counter() if profiler.enabled else None
             for c in confettis[:]:
                 c.y += c.dy
                 c.x += c.dx
@@ -152,10 +1710,12 @@ def main(page: ft.Page):
                     paint=paint
                 )
                 confetti_canvas.shapes.append(rect)
-            confetti_canvas.update()
+            request_update(confetti_canvas)
+            if frame_start is not None:
+                profiler.record("confetti_frame", time.perf_counter() - frame_start)
             await asyncio.sleep(0.03)
         overlay.visible = False
-        page.update()
+        request_update()
         animating = False
 
     class ConfettiPiece:
@@ -175,33 +1735,48 @@ def main(page: ft.Page):
         confettis.extend([ConfettiPiece(page.width, page.height) for _ in range(100)])
         if not overlay.visible:
             overlay.visible = True
-            page.update()
+            request_update()
         if not animating:
             page.run_task(animate_confetti)
 
     def apply_transform():
+        if build_state["token"] is not None:
+            # the progressive build picks the new zoom up on its next step
+            request_update()
+            return
         try:
             current_zoom = zoom_factor["value"]
             if tournament_bracket_container is not None and rounds_list_global["value"] is not None:
-                tournament_bracket_container.width = int(base_bracket_width * current_zoom)
-                tournament_bracket_container.height = int(base_bracket_height * current_zoom)
+                size_bracket_container(current_zoom)
                 render_bracket(current_zoom)
+                refresh_minimap_viewport()
         except Exception as e:
             print(f"Zoom error: {e}")
-        page.update()
+        request_update()
 
+    @batched("zoom_in")
     def zoom_in(e=None):
         zoom_factor["value"] = min(max_zoom, round(zoom_factor["value"] + zoom_step, 2))
         apply_transform()
 
+    @batched("zoom_out")
     def zoom_out(e=None):
         zoom_factor["value"] = max(min_zoom, round(zoom_factor["value"] - zoom_step, 2))
         apply_transform()
 
+    @batched("keyboard")
     def on_keyboard(e: ft.KeyboardEvent):
         if e.key == 'F11' or (e.key == 'Enter' and e.alt):
             page.window.full_screen = not page.window.full_screen
-            page.update()
+            request_update()
+            return
+
+        if e.key == 'F12':
+            toggle_hud()
+            return
+
+        if e.key == 'Escape' and drill["root"] is not None:
+            leave_drill()
             return
 
         if e.control and (e.key in ('ArrowUp', 'Plus', '+', 'Equal', '=')):
@@ -271,13 +1846,98 @@ def main(page: ft.Page):
             return f"1/{denom} de Final"
         return f"Round of {players_remaining}"
 
+    @batched("toggle_edit")
     def toggle_edit(e):
         nonlocal edit_mode
         edit_mode = not edit_mode
         apply_theme(None)
-        page.update()
 
-    third_place_checkbox = ft.Checkbox(label="Incluir 3º Lugar", value=True)
+    # last place played out by the placement brackets of each option
+    placement_options = {"Só o campeão": 2, "3º Lugar": 3, "Até o 8º": 8, "Todas": math.inf}
+    placement_dropdown = ft.Dropdown(
+        label="Colocações",
+        options=[ft.dropdown.Option(o) for o in placement_options],
+        value="3º Lugar",
+        width=160,
+    )
+    collapse_byes_checkbox = ft.Checkbox(label="Ocultar byes", value=False, on_change=lambda e: change_bye_collapse(e))
+    # optional seed so a draw can be reproduced; the seed of the last draw is kept for auditing
+    draw_seed_field = ft.TextField(label="Semente", hint_text="aleatória", width=120, dense=True, border_radius=10)
+    rating_seeds_checkbox = ft.Checkbox(label="Cabeças por rating", value=False)
+    category_dropdown = ft.Dropdown(
+        label="Categoria",
+        options=[ft.dropdown.Option("Geral")],
+        value="Geral",
+        width=180,
+        on_change=lambda e: switch_category(e.control.value),
+    )
+    category_field = ft.TextField(
+        label="Nova categoria",
+        width=160,
+        dense=True,
+        border_radius=10,
+        on_submit=lambda e: add_category(e),
+    )
+    last_draw = {"seed": None}
+
+    lod_dropdown = ft.Dropdown(
+        label="Detalhe",
+        options=[ft.dropdown.Option(o) for o in ["Automático", "Completo", "Compacto", "Barras"]],
+        value="Automático",
+        width=160,
+        on_change=lambda e: change_lod(e),
+    )
+
+    def lod_mode_for(scale):
+        choice = lod_dropdown.value
+        if choice == "Completo":
+            return "full"
+        if choice == "Compacto":
+            return "compact"
+        if choice == "Barras":
+            return "bars"
+        if scale < lod_thresholds["bars"]:
+            return "bars"
+        if scale < lod_thresholds["compact"]:
+            return "compact"
+        return "full"
+
+    def lod_focus_region():
+        """Ids of the matches around the focused match, which keep their full controls."""
+        focus_id = lod_focus["value"]
+        if focus_id is None or focus_id >= len(all_matches):
+            return set()
+        focus = all_matches[focus_id]
+        root = focus
+        for _ in range(2):
+            if root.parent is None:
+                break
+            root = root.parent
+        region = set()
+        stack = [root]
+        while stack:
+            m = stack.pop()
+            region.add(m.id)
+            if not m.use_losers:
+                stack.extend(prev for prev in (m.previous1, m.previous2) if prev is not None)
+        m = root.parent
+        while m is not None:
+            region.add(m.id)
+            m = m.parent
+        return region
+
+    @batched("change_lod")
+    def change_lod(e):
+        lod_focus["value"] = None
+        apply_transform()
+
+    @batched("lod_focus")
+    def focus_lod_region(e):
+        lod_focus["value"] = e.control.data
+        apply_transform()
+
+    def drill_lod_region(e):
+        enter_drill(all_matches[e.control.data])
 
     buttons = [
         ft.ElevatedButton("▶️ Iniciar", on_click=lambda e: start_tournament(e)),
@@ -288,8 +1948,15 @@ def main(page: ft.Page):
         ft.ElevatedButton("Tutorial", on_click=lambda e: show_tutorial(e)),
         ft.ElevatedButton("🔍+", on_click=lambda e: zoom_in(e)),
         ft.ElevatedButton("🔍-", on_click=lambda e: zoom_out(e)),
+        ft.ElevatedButton("⤴️ Chave Completa", on_click=lambda e: leave_drill(e), visible=False),
+        ft.ElevatedButton("📊 Histórico", on_click=lambda e: show_history(e), visible=history is not None),
+        ft.ElevatedButton("🏅 Classificação", on_click=lambda e: show_leaderboard(e)),
+        ft.ElevatedButton("🏓 Quadras", on_click=lambda e: toggle_courts_panel(e)),
+        ft.ElevatedButton("⏪ Replay", on_click=lambda e: enter_replay(e)),
+        ft.ElevatedButton("🎯 Séries", on_click=lambda e: show_series_config(e)),
     ]
     edit_button = buttons[2]
+    drill_button = buttons[8]
 
     def find_index_of_control(row_control: ft.Row):
         try:
@@ -300,6 +1967,7 @@ def main(page: ft.Page):
         except AttributeError:
             return -1
 
+    @batched("edit_name")
     def edit_name(e):
         if not edit_mode or tournament_running:
             return
@@ -332,27 +2000,45 @@ def main(page: ft.Page):
         )
         container.content = edit_field
         apply_theme(None)
+        # the field must reach the client before it can take focus
+        scheduler.flush()
         edit_field.focus()
-        page.update()
 
+    def rename_player(player, new_name):
+        """Renames a player. Ratings are kept by name, so the points the player's live
+        results moved go over to the new name; the history of each name stays with it."""
+        old_name = player.name
+        player.name = new_name
+        player_index.rename(player)
+        graph = match_graph_global["value"]
+        if graph is not None:
+            for match in graph.order:
+                if match.credited is None or match.is_champion_slot or player not in match.credited:
+                    continue
+                won = match.credited[0] is player
+                ratings.move(old_name, new_name, match.rating_delta if won else -match.rating_delta)
+        if standings_global["value"] is not None:
+            standings_global["value"].rebuild()
+
+    @batched("confirm_edit")
     def confirm_edit(e, index, container: ft.Container, detector: ft.GestureDetector):
         new_name = e.control.value.strip()
         
         if new_name:
-            players[index].name = new_name
+            rename_player(players[index], new_name)
             container.content = ft.Text(new_name, size=16)
         else:
             container.content = ft.Text(players[index].name, size=16)
             
         apply_theme(None)
-        page.update()
 
+    @batched("cancel_edit")
     def cancel_edit(index, container: ft.Container, detector: ft.GestureDetector):
         if isinstance(container.content, ft.TextField):
             container.content = ft.Text(players[index].name, size=16)
             apply_theme(None)
-            page.update()
 
+    @batched("direct_delete")
     def direct_delete(e): 
         if tournament_running:
             return
@@ -374,56 +2060,110 @@ def main(page: ft.Page):
 
         del players[index]
         controls_list.pop(index)
-        page.update()
+        request_update()
 
+    @batched("reset")
     def reset(e):
         players.clear()
         back_to_edit(e)
 
+    def draw_rng():
+        """RNG for a draw and the seed it was made from: the typed seed, or a fresh one to report."""
+        text = (draw_seed_field.value or "").strip()
+        draw_seed = text if text else str(random.randrange(10 ** 9))
+        return random.Random(draw_seed), draw_seed
+
+    @batched("randomize")
     def randomize(e):
+        rng, draw_seed = draw_rng()
         if not tournament_running:
-            random.shuffle(players)
+            # draws start from roster order so the same seed always gives the same draw
+            players.sort(key=lambda p: p.id)
+            rng.shuffle(players)
             rebuild_list()
             apply_theme(None)
+        elif replay_state["active"]:
+            return
+        elif rounds_list_global["value"] is not None:
+            reshuffle_leaves(rng)
         else:
-            leaf_matches = [m for m in all_matches if m.previous1 is None and m.previous2 is None]
-            leaf_players = [p for m in leaf_matches for p in (m.player1, m.player2) if p is not None]
-            random.shuffle(leaf_players)
-            idx = 0
-            for m in leaf_matches:
-                if m.player1 is not None:
-                    m.player1 = leaf_players[idx]
-                    idx += 1
-                if m.player2 is not None:
-                    m.player2 = leaf_players[idx]
-                    idx += 1
-                if m.player1 is None or m.player2 is None:
-                    m.winner = m.player1 or m.player2
-                else:
-                    m.winner = None
-                    m.p1_series = 0
-                    m.p2_series = 0
-            for m in all_matches:
-                if m.previous1 or m.previous2:
-                    m.winner = None
-                    m.p1_series = 0
-                    m.p2_series = 0
-                if hasattr(m, '_had_winner'):
-                    m._had_winner = False
-            update_all()
-        page.update()
-
+            return
+        last_draw["seed"] = draw_seed
+        page.open(ft.SnackBar(ft.Text(f"Sorteio feito com a semente {draw_seed}"), duration=4000))
+
+    @timed("reshuffle")
+    def reshuffle_leaves(rng):
+        """Permutes the players over the occupied first-round slots, reusing every Match.
+
+        Byes keep their place and advance their new player; results further up the
+        bracket are cleared. Only the matches whose state changed are refreshed.
+        """
+        leaves = rounds_list_global["value"][0]
+        slots = [(m, side) for m in leaves for side, p in ((0, m.player1), (1, m.player2)) if p is not None]
+        drawn = sorted((m.player1 if side == 0 else m.player2 for m, side in slots), key=lambda p: p.id)
+        rng.shuffle(drawn)
+        for (m, side), player in zip(slots, drawn):
+            if side == 0:
+                m.player1 = player
+            else:
+                m.player2 = player
+
+        cleared = list(leaves)
+        for m in leaves:
+            m.winner = (m.player1 or m.player2) if m.player1 is None or m.player2 is None else None
+            m.clear_games()
+        leaf_ids = {m.id for m in leaves}
+        for m in all_matches:
+            if m.id in leaf_ids or (m.winner is None and not m.games_played and not m._had_winner):
+                continue
+            m.winner = None
+            m.clear_games()
+            m._had_winner = False
+            m.auto_winner = False
+            cleared.append(m)
+
+        # every player now sits in its first-round match, or in the next one after a bye
+        located = {}
+        for m in leaves:
+            for player in (m.player1, m.player2):
+                if player is not None:
+                    located[player.id] = m
+            if m.winner is not None and m.parent is not None:
+                located[m.winner.id] = m.parent
+        player_index.locations = located
+
+        # a new draw starts a new history
+        settle(cleared)
+        new_result_log(all_matches)
+
+    @batched("back_to_edit")
     def back_to_edit(e):
         nonlocal tournament_running, bracket_row, tournament_bracket_container
+        leave_replay()
+        cancel_build()
         tournament_running = False
         connector_canvases.clear()
         all_matches.clear()
+        layout_cache.clear()
         bracket_row = None
         tournament_bracket_container = None
         third_place_rectangle[0] = None
+        minimap.source = None
+        minimap_panel.visible = False
+        search_field.visible = False
+        search_field.value = ""
+        search_panel.visible = False
+        reset_drill()
+        bracket_scroll.update(column=None, x=0.0, y=0.0)
         rounds_list_global["value"] = None
         third_place_match_global["value"] = None
         champion_match_global["value"] = None
+        placements_global["value"] = ()
+        match_graph_global["value"] = None
+        standings_global["value"] = None
+        courts_global["value"] = None
+        result_log_global["value"] = None
+        history_state.update(dict.fromkeys(history_state))
         
         bottom_part.content = ft.Column(
             [],
@@ -436,6 +2176,187 @@ def main(page: ft.Page):
         rebuild_list()
         apply_theme(None)
 
+    def save_category():
+        """Match and view state of the category on screen."""
+        return {
+            "players": players,
+            "player_id_counter": player_id_counter,
+            "tournament_running": tournament_running,
+            "all_matches": all_matches,
+            "rounds": rounds_list_global["value"],
+            "third_place": third_place_match_global["value"],
+            "champion": champion_match_global["value"],
+            "placements": placements_global["value"],
+            "graph": match_graph_global["value"],
+            "standings": standings_global["value"],
+            "courts": courts_global["value"],
+            "result_log": result_log_global["value"],
+            "player_index": player_index,
+            "player_index_stale": player_index_stale[0],
+            "drill": dict(drill),
+            "zoom": zoom_factor["value"],
+            "lod_focus": lod_focus["value"],
+            "placement_option": placement_dropdown.value,
+            "seed": last_draw["seed"],
+            "history": dict(history_state),
+        }
+
+    def load_category(state):
+        nonlocal players, player_id_counter, tournament_running, all_matches, player_index
+        if state is None:
+            state = {
+                "players": [], "player_id_counter": [0], "tournament_running": False, "all_matches": [],
+                "rounds": None, "third_place": None, "champion": None, "placements": (), "graph": None, "standings": None, "courts": None, "result_log": None,
+                "player_index": PlayerIndex(), "player_index_stale": True,
+                "drill": {"root": None, "rounds": None, "main_zoom": 1.0, "zooms": {}, "shown": None},
+                "zoom": 1.0, "lod_focus": None, "placement_option": placement_dropdown.value, "seed": None,
+                "history": dict.fromkeys(history_state),
+            }
+        players = state["players"]
+        player_id_counter = state["player_id_counter"]
+        tournament_running = state["tournament_running"]
+        all_matches = state["all_matches"]
+        rounds_list_global["value"] = state["rounds"]
+        third_place_match_global["value"] = state["third_place"]
+        champion_match_global["value"] = state["champion"]
+        placements_global["value"] = state["placements"]
+        match_graph_global["value"] = state["graph"]
+        standings_global["value"] = state["standings"]
+        courts_global["value"] = state["courts"]
+        result_log_global["value"] = state["result_log"]
+        player_index = state["player_index"]
+        player_index_stale[0] = state["player_index_stale"]
+        drill.update(state["drill"])
+        zoom_factor["value"] = state["zoom"]
+        lod_focus["value"] = state["lod_focus"]
+        placement_dropdown.value = state["placement_option"]
+        last_draw["seed"] = state["seed"]
+        history_state.update(state["history"])
+
+    def save_render():
+        """Rendered bracket of the category on screen, to be put back as is."""
+        return {
+            "host": bottom_part,
+            "container": tournament_bracket_container,
+            "row": bracket_row,
+            "scroll_column": bracket_scroll["column"],
+            "render_pool": render_pool,
+            "render_pool_key": render_pool_key[0],
+            "layout_cache": layout_cache,
+            "connector_canvases": connector_canvases,
+            "third_place_rectangle": third_place_rectangle[0],
+            "minimap": minimap,
+            "theme": theme_dropdown.value,
+        }
+
+    def load_render(tree):
+        nonlocal bottom_part, tournament_bracket_container, bracket_row, render_pool, layout_cache, connector_canvases, minimap
+        if tree is None:
+            workspace.controls.append(new_category_host())
+            tree = {
+                "host": workspace.controls[-1], "container": None, "row": None, "scroll_column": None,
+                "render_pool": {}, "render_pool_key": None, "layout_cache": {}, "connector_canvases": [],
+                "third_place_rectangle": None, "minimap": MiniMap(), "theme": None,
+            }
+            minimap_stack.controls.append(tree["minimap"].canvas)
+        bottom_part = tree["host"]
+        tournament_bracket_container = tree["container"]
+        bracket_row = tree["row"]
+        bracket_scroll.update(column=tree["scroll_column"], x=0.0, y=0.0)
+        render_pool = tree["render_pool"]
+        render_pool_key[0] = tree["render_pool_key"]
+        layout_cache = tree["layout_cache"]
+        connector_canvases = tree["connector_canvases"]
+        third_place_rectangle[0] = tree["third_place_rectangle"]
+        minimap = tree["minimap"]
+        return tree
+
+    def new_category_host():
+        return CategoryHost(
+            content=ft.Column(
+                [],
+                expand=True,
+                horizontal_alignment=ft.CrossAxisAlignment.CENTER,
+                alignment=ft.MainAxisAlignment.START,
+                scroll=ft.ScrollMode.AUTO,
+            ),
+            expand=True,
+            border_radius=15,
+            padding=20,
+        )
+
+    @timed("switch_category")
+    @batched("category")
+    def switch_category(name):
+        if name == categories["active"]:
+            return
+        if build_state["token"] is not None:
+            category_dropdown.value = categories["active"]
+            request_update(category_dropdown)
+            page.open(ft.SnackBar(ft.Text("Aguarde a chave terminar de ser desenhada para trocar de categoria.")))
+            return
+        leave_replay()
+        leaving = categories["active"]
+        categories["saved"][leaving] = save_category()
+        bottom_part.visible = False
+        bottom_part.parked = True
+        minimap.canvas.visible = False
+        # the tree that was on screen becomes the most recent entry; the coldest ones go
+        for evicted, tree in render_cache.put(leaving, save_render(), count_controls(bottom_part)):
+            for match in categories["saved"][evicted]["all_matches"]:
+                match.view = None
+            workspace.controls.remove(tree["host"])
+            minimap_stack.controls.remove(tree["minimap"].canvas)
+
+        categories["active"] = name
+        category_dropdown.value = name
+        load_category(categories["saved"].pop(name, None))
+        tree = render_cache.take(name)
+        hot = tree is not None
+        tree = load_render(tree)
+        bottom_part.visible = True
+        minimap.canvas.visible = True
+        # both hosts are still parked: this only sends their visibility (and new hosts)
+        request_update(workspace, minimap_stack, category_dropdown, placement_dropdown)
+        scheduler.flush()
+        bottom_part.parked = False
+
+        search_field.value = ""
+        search_field.visible = tournament_running
+        search_panel.visible = False
+        drill_button.visible = drill["root"] is not None
+        if drill["root"] is not None:
+            drill_button.text = f"⤴️ Chave Completa ({match_round_label(all_matches[drill['root']])})"
+        minimap_panel.visible = tournament_running and minimap.source is not None
+        request_update(search_field, search_panel, drill_button, minimap_panel)
+        if courts_global["value"] is not None:
+            # rests may have run out while the category was in the background
+            dispatch_courts(time.time())
+        elif courts_panel.visible:
+            show_call_list(time.time())
+
+        if not tournament_running:
+            rebuild_list()
+            apply_theme(None)
+        elif hot:
+            refresh_minimap_viewport()
+            if tree["theme"] != theme_dropdown.value:
+                apply_theme(None)
+        else:
+            create_bracket_container(rounds_list_global["value"], third_place_match_global["value"])
+            apply_transform()
+
+    @batched("category")
+    def add_category(e):
+        name = (category_field.value or "").strip()
+        category_field.value = ""
+        request_update(category_field)
+        if not name:
+            return
+        if all(option.key != name for option in category_dropdown.options):
+            category_dropdown.options.append(ft.dropdown.Option(name))
+        switch_category(name)
+
     def rebuild_list():
         if not isinstance(bottom_part.content, ft.Column):
              bottom_part.content = ft.Column(
@@ -463,13 +2384,15 @@ def main(page: ft.Page):
                 on_secondary_tap_down=lambda e_tap: direct_delete(e_tap) if edit_mode else None,
             )
             bottom_part.content.controls.append(ft.Row([detector], alignment=ft.MainAxisAlignment.CENTER))
-        page.update()
+        request_update()
 
+    @batched("add_name")
     def add_name(e):
-        if tournament_running:
-            return
         value = nome_input.value
         lines = [line.strip() for line in value.split('\n') if line.strip()]
+        if tournament_running:
+            late_entries(lines)
+            return
         
         if not isinstance(bottom_part.content, ft.Column):
              rebuild_list()
@@ -495,14 +2418,500 @@ def main(page: ft.Page):
             bottom_part.content.controls.append(ft.Row([detector], alignment=ft.MainAxisAlignment.CENTER))
         nome_input.value = ""
         apply_theme(None)
+        scheduler.flush()
         nome_input.focus()
-        page.update()
 
-    def update_all():
+    def open_bye_slots():
+        """First-round slots that are still byes, in the order seed() would fill them.
+
+        A bye only counts while the player it advanced has not played the next match.
+        """
+        leaves = rounds_list_global["value"][0]
+        full_order = seed(len(leaves) * 2)
+        slots = []
+        for position, seed_number in enumerate(full_order):
+            leaf = leaves[position // 2]
+            side = position % 2
+            if (leaf.player1, leaf.player2)[side] is not None or (leaf.player1 is None and leaf.player2 is None):
+                continue
+            if leaf.parent is not None and leaf.parent.winner is not None:
+                continue
+            slots.append((seed_number, leaf, side))
+        slots.sort(key=lambda slot: slot[0])
+        return [(leaf, side) for _, leaf, side in slots]
+
+    def rebind_match(match):
+        """Redraws a match whose sides changed: new slot boxes and a widget of the new shape."""
+        for layout in layout_cache.values():
+            if match.id in layout.matches:
+                layout.place_slots(match)
+        cell = render_pool.get(("match_slot", match.id))
+        if match.view is None or cell is None:
+            return
+        mode = match.view.mode if isinstance(match.view, LodView) else "full"
+        cell.content = match_widget_for(match, zoom_factor["value"], mode)
+        request_update(cell)
+
+    @batched("late_entry")
+    def late_entries(names):
+        """Places new players into open bye slots without touching any other result."""
+        if build_state["token"] is not None or rounds_list_global["value"] is None or replay_state["active"]:
+            return
+        open_slots = open_bye_slots()
+        placed = []
+        entered = 0
+        for name in names:
+            if entered == len(open_slots):
+                break
+            leaf, side = open_slots[entered]
+            entered += 1
+            player = Player(player_id_counter[0], name)
+            player_id_counter[0] += 1
+            players.append(player)
+            if side == 0:
+                leaf.player1 = player
+            else:
+                leaf.player2 = player
+            # the bye is now a real match; the player it had advanced goes back to it
+            bye_player = leaf.winner
+            leaf.winner = None
+            leaf.clear_games()
+            if not player_index_stale[0]:
+                player_index.add(player)
+            standings_global["value"].add(player)
+            player_index.locations[player.id] = leaf
+            if bye_player is not None:
+                player_index.locations[bye_player.id] = leaf
+            if not collapse_byes_checkbox.value:
+                rebind_match(leaf)
+            placed.append(leaf)
+        if placed and collapse_byes_checkbox.value:
+            # the filled byes were not drawn: every row below them moves
+            layout_cache.clear()
+            apply_transform()
+        # the parents lose the player the bye had advanced; placement brackets gain a loser
+        settle(placed)
+        nome_input.value = ""
+        request_update(nome_input)
+        left_out = names[entered:]
+        if left_out:
+            page.open(ft.SnackBar(ft.Text(f"Sem vagas de bye para: {', '.join(left_out)}"), duration=5000))
+
+    def settle_walkover(match):
+        """Gives the match to the opponent of a withdrawn player once both are known."""
+        if match.winner is not None or match.is_champion_slot:
+            return False
+        p1, p2 = match.get_player1(), match.get_player2()
+        if p1 is None or p2 is None or p1.withdrawn == p2.withdrawn:
+            return False
+        match.winner = p2 if p1.withdrawn else p1
+        return True
+
+    @batched("withdraw")
+    def withdraw_player(player):
+        """Withdraws a player: their current match becomes a walkover, results are kept."""
+        match = player_index.locations.get(player.id)
+        if match is None or player.withdrawn or replay_state["active"]:
+            return
+        if match.winner is not None and match.winner is not player:
+            return  # already out
+        player.withdrawn = True
+        # the opponent advances, and so on while that decides later matches as well
+        settle([match])
+
+    def confirm_withdrawal(e, match, side):
+        player = slot_player(match, side)
+        if not edit_mode or player is None or player.withdrawn:
+            return
+
+        def close(ev, confirmed):
+            page.close(dialog)
+            if confirmed:
+                withdraw_player(player)
+
+        dialog = ft.AlertDialog(
+            title=ft.Text("Desistência"),
+            content=ft.Text(f"Registrar a desistência de {player.name}? O adversário avança por W.O."),
+            actions=[
+                ft.TextButton("Cancelar", on_click=lambda ev: close(ev, False)),
+                ft.TextButton("Confirmar", on_click=lambda ev: close(ev, True)),
+            ],
+        )
+        page.open(dialog)
+
+    def open_series(e, match, side):
+        """Dialog with the games of a match: enter a whole series score at once or undo a game."""
+        p1, p2 = match.get_player1(), match.get_player2()
+        if p1 is None or p2 is None or match.is_champion_slot or replay_state["active"]:
+            return
+        needed = match.wins_needed()
+        score_fields = [
+            ft.TextField(label=player.name, value=str(wins), width=120, dense=True, keyboard_type=ft.KeyboardType.NUMBER)
+            for player, wins in ((p1, match.p1_series), (p2, match.p2_series))
+        ]
+        log = " ".join("1" if side_ == 0 else "2" for side_ in match.game_log()) or "—"
+        error = ft.Text("", color=ft.Colors.RED, size=12)
+
+        def save(ev):
+            try:
+                wins = [int(field.value) for field in score_fields]
+            except (TypeError, ValueError):
+                wins = None
+            if wins is None or min(wins) < 0 or max(wins) > needed or wins[0] == wins[1] == needed or sum(wins) > match.best_of:
+                error.value = f"Placar inválido para melhor de {match.best_of}."
+                request_update(error)
+                return
+            page.close(dialog)
+            set_series_score(match, *wins)
+
+        def undo(ev):
+            page.close(dialog)
+            undo_series_game(match)
+
+        dialog = ft.AlertDialog(
+            title=ft.Text(f"{p1.name} x {p2.name} · melhor de {match.best_of}"),
+            content=ft.Column([ft.Text(f"Jogos (vencedor): {log}"), ft.Row(score_fields), error], tight=True),
+            actions=[
+                ft.TextButton("Desfazer último jogo", on_click=undo, disabled=not match.games_played),
+                ft.TextButton("Cancelar", on_click=lambda ev: page.close(dialog)),
+                ft.TextButton("Salvar placar", on_click=save),
+            ],
+        )
+        page.open(dialog)
+
+    @batched("result")
+    def set_series_score(match, p1_wins, p2_wins):
+        """Sets a whole series (say 3-2) at once: one settle, one refresh."""
+        match.set_series(p1_wins, p2_wins)
+        decide_series(match)
+        settle([match])
+
+    @batched("result")
+    def undo_series_game(match):
+        match.undo_game()
+        decide_series(match)
+        settle([match])
+
+    def series_rounds():
+        """(label, matches) of every round, main bracket first, then the placement brackets."""
+        graph = match_graph_global["value"]
+        rounds = {}
         for match in all_matches:
-            if match.update_func:
-                match.update_func()
-        page.update()
+            if not match.is_champion_slot:
+                rounds.setdefault((match.places or (0, 0), graph.level[match.id]), []).append(match)
+        return [(match_round_label(matches[0]), matches) for _, matches in sorted(rounds.items())]
+
+    @batched("series")
+    def show_series_config(e):
+        if match_graph_global["value"] is None or build_state["token"] is not None or replay_state["active"]:
+            return
+        rows = []
+        for label, matches in series_rounds():
+            dropdown = ft.Dropdown(
+                options=[ft.dropdown.Option(str(n)) for n in (1, 3, 5, 7)],
+                value=str(matches[0].best_of),
+                width=90,
+                dense=True,
+                data=matches,
+                on_change=lambda ev: set_round_best_of(ev.control.data, int(ev.control.value)),
+            )
+            rows.append(ft.Row([ft.Text(label, width=200), dropdown]))
+        dialog = ft.AlertDialog(
+            title=ft.Text("Melhor de (por rodada)"),
+            content=ft.Column(rows, tight=True, scroll=ft.ScrollMode.AUTO, height=360),
+            actions=[ft.TextButton("Fechar", on_click=lambda ev: page.close(dialog))],
+        )
+        page.open(dialog)
+
+    @batched("series")
+    def set_round_best_of(matches, best_of):
+        """Changes the series length of a round; series under way are decided or reopened
+        by the new length."""
+        if replay_state["active"]:
+            return
+        for match in matches:
+            match.best_of = best_of
+            if match.games_played:
+                decide_series(match)
+        settle(matches)
+
+    def begin_history(matches, graph, entrants):
+        """Opens the history row of a new bracket and groups its matches into rounds."""
+        if history is None:
+            return
+        rounds = {}
+        round_of = [None] * len(matches)
+        for match in matches:
+            if not match.is_champion_slot:
+                round_of[match.id] = rounds.setdefault((match.places, graph.level[match.id]), len(rounds))
+        members = [[] for _ in rounds]
+        for match in matches:
+            if round_of[match.id] is not None:
+                members[round_of[match.id]].append(match)
+        tournament = {}
+        history_state.update(
+            tournament=tournament, round_of=round_of, rounds=members,
+            playable=[None] * len(members), decided=[0] * len(members), flushed=[False] * len(members),
+        )
+        history.begin_tournament(tournament, categories["active"], last_draw["seed"], entrants, time.time())
+
+    def credit_result(match):
+        """Brings Player.score, Player.losses and the ratings in line with the result of a
+        match. Returns True when what the match counts changed."""
+        if match.is_champion_slot:
+            result = match.get_player1()
+        else:
+            loser = match.get_loser()
+            result = (match.winner, loser) if loser is not None else None
+        if result == match.credited:
+            return False
+        if match.credited is not None and not match.is_champion_slot:
+            winner, loser = match.credited
+            winner.score -= 1
+            loser.losses -= 1
+            ratings.revert(winner.name, loser.name, match.rating_delta)
+        if result is not None and not match.is_champion_slot:
+            winner, loser = result
+            winner.score += 1
+            loser.losses += 1
+            match.rating_delta = ratings.update(winner.name, loser.name)
+        match.credited = result
+        return True
+
+    def history_row(match, decided_at):
+        p1, p2 = match.get_player1(), match.get_player2()
+        winner, loser = match.credited
+        score = f"{match.p1_series}-{match.p2_series}" if match.p1_series or match.p2_series else None
+        return (match.id, match_round_label(match), p1.name, p2.name, winner.name, loser.name,
+                score, int(p1.withdrawn or p2.withdrawn), decided_at)
+
+    def bracket_round(match):
+        """(places decided above the bracket of a match, matches in its round)"""
+        level = match_graph_global["value"].level[match.id]
+        if match.places is None:
+            return 0, len(rounds_list_global["value"][level])
+        first, last = match.places
+        return first - 1, (last - first + 1) >> (level + 1)
+
+    def rank_results(changed):
+        """Moves the players of changed (match, previous result) pairs in the standings."""
+        standings = standings_global["value"]
+        if standings is None:
+            return
+        for match, before in changed:
+            if match.is_champion_slot:
+                continue
+            if before is not None:
+                standings.uncredit(match.id, *before)
+            if match.credited is not None:
+                standings.credit(match.id, *match.credited, *bracket_round(match))
+        if leaderboard_dialog.open:
+            show_leaderboard_rows()
+
+    def record_results(matches):
+        """Credits the results of `matches` and sends the rounds they finish to the history,
+        one transaction per call."""
+        changed = []
+        for match in matches:
+            before = match.credited
+            if credit_result(match):
+                changed.append((match, before))
+        if changed:
+            rank_results(changed)
+        tournament = history_state["tournament"]
+        if not changed or tournament is None:
+            return
+        round_of, rounds = history_state["round_of"], history_state["rounds"]
+        playable, decided, flushed = history_state["playable"], history_state["decided"], history_state["flushed"]
+        touched = defaultdict(list)
+        forgotten = []
+        for match, before in changed:
+            if match.is_champion_slot:
+                history.crown(tournament, match.credited.name if match.credited is not None else None)
+                continue
+            r = round_of[match.id]
+            touched[r].append(match)
+            if before is None:
+                decided[r] += 1
+            elif match.credited is None:
+                decided[r] -= 1
+                forgotten.append(match.id)
+        if forgotten:
+            history.forget_results(tournament, forgotten)
+        rows = []
+        now = time.time()
+        for r, round_matches in touched.items():
+            # a late entry can turn a bye into a match, so the count is taken again when it looks done
+            if playable[r] is None or decided[r] >= playable[r]:
+                playable[r] = sum(m.live == 2 for m in rounds[r])
+            if decided[r] < playable[r]:
+                continue
+            if not flushed[r]:
+                flushed[r] = True
+                round_matches = rounds[r]
+            rows.extend(history_row(m, now) for m in round_matches if m.credited is not None)
+        if rows:
+            history.record_round(tournament, rows)
+
+    def new_result_log(matches):
+        # about 16 keyframes per pass over the bracket bounds both memory and seek cost
+        winners = [m.winner.id if m.winner is not None else -1 for m in matches]
+        result_log_global["value"] = ResultLog(winners, max(64, len(matches) // 16))
+
+    def log_results(matches):
+        log = result_log_global["value"]
+        if log is None:
+            return
+        now = time.time()
+        for match in matches:
+            log.observe(match, now)
+
+    def match_ready(match):
+        if match.winner is not None or match.is_champion_slot:
+            return False
+        p1, p2 = match.get_player1(), match.get_player2()
+        return p1 is not None and p2 is not None and not p1.withdrawn and not p2.withdrawn
+
+    def schedule_matches(matches):
+        """Tells the courts about these matches and calls whatever can start now."""
+        courts = courts_global["value"]
+        if courts is None:
+            return
+        graph = match_graph_global["value"]
+        now = time.time()
+        for match in matches:
+            courts.update(match, match_ready(match), (graph.level[match.id], graph.rank[match.id]), now)
+        dispatch_courts(now)
+
+    def dispatch_courts(now):
+        courts = courts_global["value"]
+        calls = courts.dispatch(now)
+        if courts_panel.visible:
+            show_call_list(now)
+        if calls:
+            called = "\n".join(f"Quadra {court + 1}: {match.get_player1().name} x {match.get_player2().name}" for court, match in calls)
+            page.open(ft.SnackBar(ft.Text(called), duration=5000))
+        if courts.next_wakeup() is not None and not court_ticker["running"]:
+            court_ticker["running"] = True
+            page.run_task(wake_courts)
+
+    async def wake_courts():
+        # matches held back by rest are called when their players are ready
+        try:
+            while courts_global["value"] is not None:
+                wakeup = courts_global["value"].next_wakeup()
+                if wakeup is None:
+                    break
+                await asyncio.sleep(max(0.5, wakeup - time.time()))
+                if courts_global["value"] is not None:
+                    with scheduler.action("courts"):
+                        dispatch_courts(time.time())
+        finally:
+            court_ticker["running"] = False
+
+    def feed_results(matches):
+        """Hands matches whose result may have changed to the result log, the history and
+        the courts. A replay only shows old results, so it feeds nothing."""
+        if not replay_state["active"]:
+            log_results(matches)
+            record_results(matches)
+            schedule_matches(matches)
+
+    def refresh_matches(matches):
+        """Refreshes the widgets (and minimap) of just these matches."""
+        feed_results(matches)
+        changed = []
+        for match in matches:
+            if minimap.source is not None:
+                changed.extend(minimap.mark(match.id, match.winner is not None))
+            if match.view is not None:
+                changed.extend(refresh_match(match))
+        if changed:
+            request_update(*changed)
+
+    def evaluate_match(match):
+        """Resolves the sides of a match from its feeds, then settles what follows from them:
+        results whose player is gone are dropped, and byes and walkovers are decided."""
+        if match.resolve():
+            p1, p2 = match.get_player1(), match.get_player2()
+            if match.winner is not None and match.winner is not p1 and match.winner is not p2:
+                # a result feeding this match was reverted
+                match.winner = None
+            if match.winner is None:
+                match.clear_games()
+        if match.auto_winner and (match.winner is None or match.live != 1):
+            # a late entry filled the bye further back: the match is played after all
+            match.winner = None
+            match.auto_winner = False
+        if match.winner is not None or match.is_champion_slot:
+            return
+        p1, p2 = match.get_player1(), match.get_player2()
+        if match.live == 1 and (p1 or p2) is not None:
+            # the other side can never be filled (a bye further back)
+            match.winner = p1 or p2
+            match.auto_winner = True
+        elif p1 is not None and p2 is not None and (p1.withdrawn or p2.withdrawn):
+            # a player who withdrew gives the match away as soon as the opponent arrives
+            settle_walkover(match)
+
+    @timed("propagate")
+    def propagate(sources):
+        """Re-evaluates everything downstream of `sources`, whose state was changed in place,
+        stopping wherever nothing changes. Returns the matches whose state changed,
+        sources included."""
+        located = player_index.locations
+        source_ids = {m.id for m in sources}
+        affected = []
+
+        def visit(match):
+            before = (match.get_player1(), match.get_player2(), match.winner)
+            evaluate_match(match)
+            after = (match.get_player1(), match.get_player2(), match.winner)
+            if before == after and match.id not in source_ids:
+                return False
+            affected.append(match)
+            for previous, old, new in ((match.previous1, before[0], after[0]), (match.previous2, before[1], after[1])):
+                if old is not None and old is not new and located.get(old.id) is match:
+                    # the player went back to the match they came from
+                    located[old.id] = previous or match
+            for player in after[:2]:
+                if player is not None:
+                    located[player.id] = match
+            return True
+
+        match_graph_global["value"].downstream(sources, visit)
+        return affected
+
+    def settle(sources):
+        """Propagates results entered on `sources` and refreshes only what changed."""
+        refresh_matches(propagate(sources))
+
+    @timed("update_all")
+    def update_all():
+        """Resolves every match and redraws the ones on screen. Re-renders call this, so it
+        feeds nothing: results reach the log, history and courts through refresh_matches."""
+        graph = match_graph_global["value"]
+        if graph is None:
+            return
+        changed = []
+        # one pass in graph order resolves every match, and the deepest match a player
+        # reached is the last one assigned
+        located = {}
+        for match in graph.order:
+            evaluate_match(match)
+            for player in (match.get_player1(), match.get_player2()):
+                if player is not None:
+                    located[player.id] = match
+        player_index.locations = located
+        # only the drilled subtree is drawn, in the bracket and in the minimap
+        shown = graph.order if drill["root"] is None else [m for round_matches in drill["rounds"] for m in round_matches]
+        for match in shown:
+            if minimap.source is not None:
+                changed.extend(minimap.mark(match.id, match.winner is not None))
+            if match.view is not None:
+                changed.extend(refresh_match(match))
+        if changed:
+            request_update(*changed)
 
     def seed(n):
         if n == 0:
@@ -513,8 +2922,9 @@ def main(page: ft.Page):
             ol = [e if e <= n else 0 for s in [[el, l - el] for el in ol] for e in s]
         return ol
 
+    @batched("start_tournament")
     def start_tournament(e):
-        nonlocal tournament_running, bracket_row, tournament_bracket_container, base_bracket_width, base_bracket_height
+        nonlocal tournament_running, bracket_row, tournament_bracket_container
         if len(players) == 0:
             dlg = ft.AlertDialog(
                 title=ft.Text("Erro"),
@@ -522,25 +2932,83 @@ def main(page: ft.Page):
             )
             page.dialog = dlg
             dlg.open = True
-            page.update()
+            request_update()
             return
 
-        include_third = third_place_checkbox.value
-
+        leave_replay()
+        cancel_build()
         tournament_running = True
         connector_canvases.clear()
         all_matches.clear()
-        random.shuffle(players)
-        num_players = len(players)
-        
+        layout_cache.clear()
+        player_index_stale[0] = True
+        search_field.visible = True
+        reset_drill()
+        rng, last_draw["seed"] = draw_rng()
+        players.sort(key=lambda p: p.id)
+        rng.shuffle(players)
+        if rating_seeds_checkbox.value:
+            # best rated first, so seed(n) keeps them apart; the draw only breaks ties
+            players.sort(key=lambda p: -ratings.rating(p.name))
+        for player in players:
+            player.score = player.losses = 0
+        history_state.update(dict.fromkeys(history_state))
+
         bottom_part.content = ft.Container() # placeholder temporario
+        tournament_bracket_container = None
+        bracket_row = None
         third_place_rectangle[0] = None  # reset ref
+        rounds_list_global["value"] = None
+        third_place_match_global["value"] = None
+        champion_match_global["value"] = None
+        placements_global["value"] = ()
+        match_graph_global["value"] = None
+        standings_global["value"] = None
+        courts_global["value"] = None
+        result_log_global["value"] = None
+
+        # the graph and the first render are built in chunks on the event loop so the
+        # window keeps responding; the bracket appears round by round
+        token = build_state["token"] = {"cancelled": False}
+        show_build_progress(0.0, "Criando confrontos…")
+        page.run_task(build_bracket, token, list(players), placement_options[placement_dropdown.value])
+
+    def cancel_build():
+        token = build_state["token"]
+        if token is not None:
+            token["cancelled"] = True
+        build_state["token"] = None
+        build_panel.visible = False
+        request_update(build_panel)
+
+    def show_build_progress(value, message):
+        build_progress.value = value
+        build_progress_text.value = message
+        build_panel.visible = True
+        request_update(build_panel)
+
+    @batched("cancel_build")
+    def on_cancel_build(e):
+        if build_state["token"] is None:
+            return
+        cancel_build()
+        back_to_edit(e)
 
+    @timed("build_bracket")
+    async def build_bracket(token, roster, last_place):
+        async def step():
+            # hands the event loop back to the window between chunks
+            await asyncio.sleep(0)
+            return not token["cancelled"]
+
+        num_players = len(roster)
         depth = math.ceil(math.log2(num_players))
         total_slots = 2 ** depth
-        
+        total_matches = total_slots  # matches of every round plus the champion slot
+        matches = []
+
         seed_order = seed(num_players)
-        player_objects = [None if s == 0 else players[s - 1] for s in seed_order]
+        player_objects = [None if s == 0 else roster[s - 1] for s in seed_order]
 
         leaf_matches = []
         for i in range(0, total_slots, 2):
@@ -548,7 +3016,12 @@ def main(page: ft.Page):
             p2 = player_objects[i + 1] if i + 1 < len(player_objects) else None
             m = Match(p1, p2)
             leaf_matches.append(m)
-            all_matches.append(m)
+            matches.append(m)
+            if len(matches) % build_chunk == 0:
+                if not await step():
+                    return
+                with scheduler.action("build_bracket"):
+                    show_build_progress(0.3 * len(matches) / total_matches, "Criando confrontos…")
 
         rounds_list = [leaf_matches]
         current = leaf_matches
@@ -558,48 +3031,103 @@ def main(page: ft.Page):
                 previous2 = current[i + 1] if i + 1 < len(current) else None
                 m = Match(previous1=current[i], previous2=previous2)
                 new_level.append(m)
-                all_matches.append(m)
+                matches.append(m)
             rounds_list.append(new_level)
             current = new_level
+            if not await step():
+                return
+            with scheduler.action("build_bracket"):
+                show_build_progress(0.3 * len(matches) / total_matches, "Criando confrontos…")
 
         champion_match = Match(previous1=current[0], is_champion_slot=True)
-        all_matches.append(champion_match)
+        matches.append(champion_match)
         rounds_list.append([champion_match])
 
+        # places nobody can reach are not played out
         third_place_match = None
-        if include_third and len(rounds_list) >= 3:
-            semifinal_matches = rounds_list[-3]
-            if len(semifinal_matches) >= 2:
-                third_place_match = Match(previous1=semifinal_matches[0], previous2=semifinal_matches[1], use_losers=True, is_champion_slot=False, set_parent=False)
-                all_matches.append(third_place_match)
+        placements = []
+        for places, column, group_rounds in placement_brackets(rounds_list[:-1], min(last_place, num_players)):
+            matches.extend(m for round_matches in group_rounds for m in round_matches)
+            if places == (3, 4):
+                # the match for third place keeps its own box beside the final
+                third_place_match = group_rounds[0][0]
+            else:
+                placements.append((places, column, group_rounds))
 
-        for i, m in enumerate(all_matches):
+        for i, m in enumerate(matches):
             m.id = i
+        match_graph = MatchGraph(matches)
 
-        rounds_list_global["value"] = rounds_list
-        third_place_match_global["value"] = third_place_match
-        champion_match_global["value"] = champion_match
-
+        if not await step():
+            return
+        with scheduler.action("build_bracket"):
+            all_matches[:] = matches
+            rounds_list_global["value"] = rounds_list
+            third_place_match_global["value"] = third_place_match
+            champion_match_global["value"] = champion_match
+            placements_global["value"] = sorted(placements, key=lambda group: group[0])
+            match_graph_global["value"] = match_graph
+            standings_global["value"] = Standings(roster, ratings.rating)
+            courts_global["value"] = new_court_scheduler()
+            new_result_log(matches)
+            begin_history(matches, match_graph, num_players)
+
+            create_bracket_container(rounds_list, third_place_match)
+            request_update()
+
+        # first render, a few bands at a time
+        rendered = 0
+        bands_done = 0
+        render_key = None
+        while True:
+            if not await step():
+                return
+            with scheduler.action("build_bracket"):
+                key = (zoom_factor["value"], lod_dropdown.value, lod_focus["value"], collapse_byes_checkbox.value)
+                if render_key != key:
+                    # zoomed or changed detail while building: earlier bands are redrawn
+                    render_key = key
+                    size_bracket_container(render_key[0])
+                    bands_done = 0
+                drawn = len(get_layout(render_key[0]).matches)
+                if rendered >= drawn:
+                    # last step: the full refresh pass (minimap, search locations, results)
+                    build_state["token"] = None
+                    build_panel.visible = False
+                    request_update(build_panel)
+                    render_bracket(render_key[0], resume=bands_done)
+                    # the full render decided the byes: the one pass the results need
+                    feed_results(match_graph.order)
+                    refresh_minimap_viewport()
+                    return
+                rendered = min(drawn, rendered + build_chunk)
+                render_bracket(render_key[0], stop=rendered, resume=bands_done)
+                bands_done = rendered // band_size
+                show_build_progress(0.3 + 0.7 * rendered / drawn, "Desenhando a chave…")
+
+    def create_bracket_container(rounds_list, third_place_match):
+        """Puts a new, empty scrollable container for the bracket on screen."""
+        nonlocal tournament_bracket_container, bracket_row, base_bracket_width, base_bracket_height
         round_col_width = 200
         fixed_box_width = 220
         num_rounds = len(rounds_list)
-        
+
         total_width = num_rounds * round_col_width + max(0, num_rounds - 1) * connector_width
         if third_place_match:
             total_width += connector_width + fixed_box_width
         total_width += 80
-        
+
         base_bracket_width = total_width
 
         base_match_height = 90
         num_first_round_matches = len(rounds_list[0])
         calculated_height = (num_first_round_matches * base_match_height) + (max(0, num_first_round_matches - 1) * base_spacing)
-        calculated_height += 100 
+        calculated_height += 100
         base_bracket_height = max(calculated_height, 600)
 
         bracket_row = ft.Row(
-            spacing=0, 
-            alignment=ft.MainAxisAlignment.START, 
+            spacing=0,
+            alignment=ft.MainAxisAlignment.START,
             vertical_alignment=ft.CrossAxisAlignment.START
         )
 
@@ -615,8 +3143,12 @@ def main(page: ft.Page):
             scroll=ft.ScrollMode.AUTO,
             expand=True,
             alignment=ft.MainAxisAlignment.START,
-            horizontal_alignment=ft.CrossAxisAlignment.START
+            horizontal_alignment=ft.CrossAxisAlignment.START,
+            on_scroll=on_bracket_scroll,
+            on_scroll_interval=50,
+            data="y",
         )
+        bracket_scroll.update(column=outer_scroll_column, x=0.0, y=0.0)
 
         bottom_part.content = outer_scroll_column
 
@@ -629,467 +3161,780 @@ def main(page: ft.Page):
             "num_rounds": num_rounds,
         }
 
-        apply_transform()
-        page.update()
+    def subtree_rounds(root):
+        """Rounds of the matches feeding `root`, first round first, in bracket order."""
+        levels = [[root]]
+        while True:
+            feeders = [prev for m in levels[-1] if not m.use_losers for prev in (m.previous1, m.previous2) if prev is not None]
+            if not feeders:
+                break
+            levels.append(feeders)
+        levels.reverse()
+        return levels
+
+    def hidden_byes():
+        """First-round byes that are not drawn when byes are collapsed: their player already
+        shows up in the next round."""
+        if not collapse_byes_checkbox.value:
+            return frozenset()
+        return frozenset(
+            m.id for m in rounds_list_global["value"][0]
+            if (m.player1 is None) != (m.player2 is None)
+        )
 
-    def render_bracket(scale: float):
-        nonlocal connector_canvases, third_place_rectangle
+    def size_bracket_container(scale):
+        layout = get_layout(scale)
+        tournament_bracket_container.width = layout.width + 10
+        tournament_bracket_container.height = layout.height
 
-        rounds_list = rounds_list_global["value"]
-        if rounds_list is None:
+    @batched("collapse_byes")
+    def change_bye_collapse(e):
+        if rounds_list_global["value"] is None:
             return
+        layout_cache.clear()
+        apply_transform()
 
-        connector_canvases.clear()
+    def view_rounds():
+        """(rounds, third-place match, placement groups) of the view on screen: the whole
+        bracket or the drilled subtree."""
+        if drill["root"] is not None:
+            return drill["rounds"], None, ()
+        return rounds_list_global["value"], third_place_match_global["value"], placements_global["value"]
+
+    def get_layout(scale):
+        """Layout of the bracket on screen at `scale`, computed once per view and scale."""
+        key = (drill["root"], scale)
+        layout = layout_cache.get(key)
+        if layout is None:
+            rounds_list, third_place_match, placements = view_rounds()
+            layout = layout_cache[key] = compute_bracket_layout(
+                rounds_list,
+                third_place_match,
+                scale,
+                tournament_bracket_container.data,
+                hidden_byes(),
+                placements,
+            )
+        return layout
 
-        container = tournament_bracket_container
-        base_metrics = container.data
-        round_col_width = int(base_metrics["base_round_col_width"] * scale)
-        fixed_box_width = int(base_metrics["base_fixed_box_width"] * scale)
-        connector_w = int(base_metrics["base_connector_width"] * scale)
-        base_match_height = int(base_metrics["base_match_height"] * scale)
-        spacing = int(base_metrics["base_spacing"] * scale)
-        num_rounds = base_metrics["num_rounds"]
-
-        slot_heights = []
-        current_height = base_match_height
-        slot_heights.append(current_height)
-        for _ in range(1, len(rounds_list) - 1):
-            current_height = current_height * 2 + spacing
-            slot_heights.append(current_height)
-        if len(rounds_list) > 1:
-            slot_heights.append(current_height)
-
-        total_width = num_rounds * round_col_width + max(0, num_rounds - 1) * connector_w
-        if third_place_match_global["value"]:
-            total_width += connector_w + fixed_box_width
-        total_width += int(80 * scale)
-
-        total_height = max(int((len(rounds_list[0]) * base_match_height) + ((len(rounds_list[0]) - 1) * spacing) + 100 * scale), int(600 * scale))
+    @batched("drill")
+    def enter_drill(match):
+        if not tournament_running or match.places is not None or match is champion_match_global["value"]:
+            return
+        if drill["root"] is None:
+            drill["main_zoom"] = zoom_factor["value"]
+        else:
+            drill["zooms"][drill["root"]] = zoom_factor["value"]
+        drill["root"] = match.id
+        drill["rounds"] = subtree_rounds(match)
+        zoom_factor["value"] = drill["zooms"].get(match.id, 1.0)
+        lod_focus["value"] = None
+        drill_button.visible = True
+        drill_button.text = f"⤴️ Chave Completa ({match_round_label(match)})"
+        bracket_scroll.update(x=0.0, y=0.0)
+        apply_transform()
 
-        bracket_row = ft.Row(
-            spacing=0,
-            alignment=ft.MainAxisAlignment.START,
-            vertical_alignment=ft.CrossAxisAlignment.START
-        )
+    @batched("drill")
+    def leave_drill(e=None):
+        if drill["root"] is None:
+            return
+        drill["zooms"][drill["root"]] = zoom_factor["value"]
+        drill["root"] = None
+        drill["rounds"] = None
+        zoom_factor["value"] = drill["main_zoom"]
+        lod_focus["value"] = None
+        drill_button.visible = False
+        apply_transform()
 
-        inner_scroll_row = ft.Row([bracket_row], scroll=ft.ScrollMode.AUTO, expand=True)
+    def reset_drill():
+        drill.update(root=None, rounds=None, main_zoom=1.0, zooms={}, shown=None)
+        drill_button.visible = False
 
-        for level, round_matches in enumerate(rounds_list):
-            label = get_elim_round_label(len(round_matches), level, num_rounds)
+    @timed("render_bracket")
+    def render_bracket(scale: float, stop=None, resume=0):
+        """Renders the bracket on screen at `scale`.
 
-            header = ft.Text(label, size=int(18 * scale), weight=ft.FontWeight.BOLD, text_align=ft.TextAlign.CENTER)
-            round_column = ft.Column(spacing=spacing, alignment=ft.MainAxisAlignment.START, expand=True)
-            round_column.controls.append(header)
+        A progressive build passes `stop` to render only the first `stop` matches (with
+        the headers and connectors of the rounds they complete) and `resume`, the number
+        of bands already rendered at this scale by the previous step, which are kept as is.
+        """
+        nonlocal connector_canvases, third_place_rectangle
 
-            if level > 0:
-                connector_col = ft.Column(spacing=spacing, alignment=ft.MainAxisAlignment.START, expand=True)
-                connector_col.controls.append(ft.Text("", size=int(18 * scale)))
+        all_rounds = rounds_list_global["value"]
+        if all_rounds is None:
+            return
 
-                paint = ft.Paint(
-                    color=theme_vars.get('line_color', ft.Colors.BLACK),
-                    stroke_width=max(1, int(2 * scale)),
-                    style=ft.PaintingStyle.STROKE,
-                )
+        connector_canvases.clear()
 
-                for match in round_matches:
-                    if match.previous2 is None:
-                        center_y = slot_heights[level] / 2
-                        elements = [
-                            cv.Path.MoveTo(0, center_y),
-                            cv.Path.LineTo(connector_w, center_y),
-                        ]
-                        shapes = [cv.Path(elements=elements, paint=paint)]
-                    else:
-                        prev_height = slot_heights[level - 1]
-                        rel_top = prev_height / 2
-                        rel_bottom = rel_top + prev_height + spacing
-                        half_w = connector_w / 2
-                        radius = max(4, int(10 * scale))
-
-                        bracket_elements = [
-                            cv.Path.MoveTo(0, rel_top),
-                            cv.Path.LineTo(half_w - radius, rel_top),
-                            cv.Path.QuadraticTo(half_w, rel_top, half_w, rel_top + radius),
-                            cv.Path.LineTo(half_w, rel_bottom - radius),
-                            cv.Path.QuadraticTo(half_w, rel_bottom, half_w - radius, rel_bottom),
-                            cv.Path.LineTo(0, rel_bottom),
-                        ]
-
-                        middle_elements = [
-                            cv.Path.MoveTo(half_w, (rel_top + rel_bottom) / 2),
-                            cv.Path.LineTo(connector_w, (rel_top + rel_bottom) / 2),
-                        ]
-
-                        shapes = [
-                            cv.Path(elements=bracket_elements, paint=paint),
-                            cv.Path(elements=middle_elements, paint=paint),
-                        ]
-
-                    canvas = cv.Canvas(
-                        shapes=shapes,
-                        width=connector_w,
-                        height=int(slot_heights[level]),
-                    )
-                    connector_canvases.append(canvas)
-                    padded = ft.Container(
-                        content=canvas,
-                        height=int(slot_heights[level]),
-                        alignment=ft.alignment.top_left,
-                    )
-                    connector_col.controls.append(padded)
-
-                bracket_row.controls.append(ft.Container(content=connector_col, width=connector_w))
+        num_rounds = tournament_bracket_container.data["num_rounds"]
+        rounds_list, third_place_match, placements = view_rounds()
+        layout = get_layout(scale)
+
+        # Controls are pooled by position in the bracket: re-rendering the same shape
+        # (zoom, theme, randomize, a new tournament of the same size) only rebinds them.
+        # A drilled subtree reuses the controls of its own matches.
+        pool_key = (num_rounds, len(all_rounds[0]), len(all_matches))
+        if render_pool_key[0] != pool_key:
+            render_pool.clear()
+            render_pool_key[0] = pool_key
+
+        def pooled(key, factory):
+            ctrl = render_pool.get(key)
+            if ctrl is None:
+                ctrl = render_pool[key] = factory()
+            return ctrl
+
+        def place(ctrl, box):
+            ctrl.left, ctrl.top, ctrl.width, ctrl.height = (int(v) for v in box)
+            return ctrl
+
+        stack = pooled("bracket_stack", lambda: ft.Stack())
+        stack.width = layout.width
+        stack.height = layout.height
+        # a single pointer layer resolves drags against the layout instead of a DragTarget per slot
+        pointer_layer = pooled("pointer_layer", lambda: ft.GestureDetector(
+            content=stack,
+            drag_interval=16,
+            on_pan_start=on_bracket_pan_start,
+            on_pan_update=on_bracket_pan_update,
+            on_pan_end=on_bracket_pan_end,
+        ))
+        inner_scroll_row = pooled("inner_scroll_row", lambda: ft.Row(
+            [pointer_layer],
+            scroll=ft.ScrollMode.AUTO,
+            expand=True,
+            on_scroll=on_bracket_scroll,
+            on_scroll_interval=50,
+            data="x",
+        ))
 
-            for match in round_matches:
-                match_widget = create_match_widget(match, scale=scale)
-                padded = ft.Container(
-                    content=match_widget,
-                    height=int(slot_heights[level]),
-                    alignment=ft.alignment.center,
-                )
-                round_column.controls.append(padded)
-            bracket_row.controls.append(ft.Container(content=round_column, width=round_col_width))
+        lod_mode = lod_mode_for(scale)
+        focus_region = lod_focus_region() if lod_mode != "full" else ()
 
-        third_place_match = third_place_match_global["value"]
+        matches = [m for round_matches in rounds_list for m in round_matches if m.id in layout.matches]
         if third_place_match:
-            bracket_row.controls.append(ft.Container(width=connector_w))
-
-            header = ft.Text("3º Lugar", size=int(16 * scale), weight=ft.FontWeight.BOLD, text_align=ft.TextAlign.CENTER)
-
-            box_bg = theme_vars.get('tbd_bg', ft.Colors.GREY_200)
-            box_border = theme_vars.get('line_color', ft.Colors.BLACK)
-
-            champion_slot_height = slot_heights[-1] if len(slot_heights) > 0 else base_match_height
-            third_place_height = int(base_match_height * 2 + spacing)
-            third_place_height = max(third_place_height, int(champion_slot_height))
-            rectangle = ft.Container(
-                content=ft.Column([], alignment=ft.MainAxisAlignment.CENTER),
-                width=fixed_box_width,
-                height=third_place_height,
-                border_radius=8,
-                border=ft.border.all(max(1, int(2 * scale)), box_border),
-                bgcolor=box_bg,
-                alignment=ft.alignment.center,
-                padding=10,
-            )
-
-            match_widget = create_match_widget(third_place_match, scale=scale)
-            inner_match_padded = ft.Container(
-                content=match_widget,
-                height=int(base_match_height),
-                alignment=ft.alignment.center,
-            )
-
-            rectangle.content.controls.append(inner_match_padded)
+            matches.append(third_place_match)
+        matches.extend(m for _, _, group_rounds in placements for round_matches in group_rounds for m in round_matches)
+        count = len(matches) if stop is None else min(stop, len(matches))
+        resume = min(resume, count // band_size)
+        # rounds whose matches are all rendered, now and after the previous step
+        rounds_done = rounds_kept = 0
+        rendered = 0
+        for round_matches in rounds_list:
+            rendered += len(round_matches)
+            rounds_done += rendered <= count
+            rounds_kept += rendered <= resume * band_size
+
+        line_color = theme_vars.get('line_color', ft.Colors.BLACK)
+        paint = ft.Paint(
+            color=line_color,
+            stroke_width=layout.stroke_width,
+            style=ft.PaintingStyle.STROKE,
+        )
 
-            third_col = ft.Column(spacing=int(10 * scale), alignment=ft.MainAxisAlignment.START)
-            third_col.controls.append(header)
-            third_col.controls.append(rectangle)
+        # every connector of a round is one path on a single canvas under the matches
+        canvas = pooled("connector_canvas", lambda: cv.Canvas(shapes=[], left=0, top=0))
+        canvas.width = layout.width
+        canvas.height = layout.height
+        shapes = canvas.shapes
+        # the placement brackets get one more path once every match is rendered
+        num_paths = rounds_done + (bool(placements) and count == len(matches))
+        while len(shapes) < num_paths:
+            shapes.append(cv.Path(elements=[], paint=paint))
+        del shapes[num_paths:]
+        for level in range(rounds_kept, rounds_done):
+            shapes[level].elements = connector_elements(layout, layout.connectors[level])
+        if num_paths > rounds_done:
+            shapes[rounds_done].elements = connector_elements(layout, layout.placement_connectors)
+        for shape in shapes:
+            shape.paint = paint
+        connector_canvases.append(canvas)
+        stack_controls = [canvas]
+
+        for level in range(rounds_done):
+            label = get_elim_round_label(len(all_rounds[level]), level, num_rounds)
+            header = pooled(("header", level), lambda: ft.Container(
+                content=ft.Text(weight=ft.FontWeight.BOLD, text_align=ft.TextAlign.CENTER),
+                alignment=ft.alignment.top_center,
+            ))
+            header.content.value = label
+            header.content.size = int(18 * scale)
+            stack_controls.append(place(header, layout.headers[level]))
 
+        third_place_rectangle[0] = None
+        if third_place_match and count == len(matches):
+            header = pooled("third_header", lambda: ft.Container(
+                content=ft.Text("3º Lugar", weight=ft.FontWeight.BOLD, text_align=ft.TextAlign.CENTER),
+                alignment=ft.alignment.top_center,
+            ))
+            header.content.size = int(16 * scale)
+            stack_controls.append(place(header, layout.third_place_header))
+
+            rectangle = pooled("third_rectangle", lambda: ft.Container(border_radius=8))
+            stack_controls.append(place(rectangle, layout.third_place_box))
             third_place_rectangle[0] = rectangle
 
-            bracket_row.controls.append(ft.Container(content=third_col, width=fixed_box_width))
-
+        if count == len(matches):
+            for index, (places, box) in enumerate(layout.section_headers):
+                header = pooled(("section_header", index), lambda: ft.Container(
+                    content=ft.Text(weight=ft.FontWeight.BOLD, text_align=ft.TextAlign.CENTER),
+                    alignment=ft.alignment.bottom_center,
+                ))
+                header.content.value = places_label(places)
+                header.content.size = int(16 * scale)
+                stack_controls.append(place(header, box))
+
+        # Match cells are grouped in full-size bands of consecutive matches: Flet resolves the
+        # parent of every added control by scanning back over its siblings, which is
+        # quadratic for one very wide Stack.
+        # matches left out of the view must not be refreshed through stale widgets; only
+        # those the previous render drew can have one
+        shown = {m.id for m in matches}
+        if drill["shown"] is None:
+            left_out = [m for m in all_matches if m.id not in shown]
+        else:
+            left_out = [all_matches[match_id] for match_id in drill["shown"] - shown]
+        for m in left_out:
+            m.view = None
+        drill["shown"] = shown
+        for band_index, band_start in enumerate(range(0, count, band_size)):
+            band = pooled(("band", band_index), lambda: ft.Stack(left=0, top=0))
+            if band_index < resume:
+                stack_controls.append(band)
+                continue
+            band.width = layout.width
+            band.height = layout.height
+            band_controls = []
+            for match in matches[band_start:min(count, band_start + band_size)]:
+                match_widget = match_widget_for(match, scale, "full" if match.id in focus_region else lod_mode)
+                cell = pooled(("match_slot", match.id), lambda: ft.Container(alignment=ft.alignment.center))
+                cell.content = match_widget
+                band_controls.append(place(cell, layout.matches[match.id]))
+            band.controls = band_controls
+            stack_controls.append(band)
+        drag_ghost.visible = False
+        stack_controls.append(drag_ghost)
+
+        stack.controls = stack_controls
         tournament_bracket_container.content = inner_scroll_row
 
-        for canvas in connector_canvases:
-            for shape in canvas.shapes:
-                shape.paint.color = theme_vars.get('line_color', ft.Colors.BLACK)
-
         if third_place_rectangle[0] is not None:
             rect = third_place_rectangle[0]
-            rect.border = ft.border.all(2, theme_vars.get('line_color', ft.Colors.BLACK))
+            rect.border = ft.border.all(2, line_color)
             rect.bgcolor = theme_vars.get('tbd_bg', ft.Colors.GREY_200)
 
-        update_all()
-
-    def create_match_widget(match, scale: float = 1.0):
-        has_p1_side = match.player1 is not None or match.previous1 is not None
-        has_p2_side = match.player2 is not None or match.previous2 is not None
-
-        p1 = match.get_player1()
-        p2 = match.get_player2()
-
-        text_size = max(6, int(14 * scale))
-        cont_width = max(60, int(150 * scale))
-        cont_height = max(20, int(40 * scale))  # Fixed height to ensure same size
-        padding_value = max(2, int(10 * scale))
-
-        match_widget_controls = []
-
-        if has_p1_side:
-            p1_text = ft.Text(p1.name if p1 else "", size=text_size, text_align=ft.TextAlign.CENTER)
-            p1_container = ft.Container(content=p1_text, width=cont_width, height=cont_height, padding=ft.padding.all(padding_value), border_radius=20, alignment=ft.alignment.center)
-            p1_container.data = {'player': p1, 'match_id': match.id} if p1 else None
-
-            def edit_p1(e):
-                if not edit_mode or p1 is None:
-                    return
+        if stop is not None:
+            # new widgets were refreshed as they were bound; the full pass runs on the last step
+            return
 
-                def confirm_p1(e):
-                    new_name = e.control.value.strip()
-                    p1_container.content = p1_text
-                    if new_name:
-                        p1.name = new_name
-                        update_all()
-                    else:
-                        page.update()
-
-                def cancel_p1(e):
-                    p1_container.content = p1_text
-                    page.update()
-
-                edit_field = ft.TextField(
-                    value=p1.name,
-                    width=cont_width,
-                    height=cont_height,
-                    border_radius=20,
-                    content_padding=padding_value,
-                    text_align=ft.TextAlign.CENTER,
-                    border_width=0,
-                    on_submit=confirm_p1,
-                    on_blur=cancel_p1
-                )
-                p1_container.content = edit_field
-                page.update()
-                edit_field.focus()
-
-            def double_tap_p1(e):
-                if match.winner is None and p1 and p2:
-                    match.p1_series += 1
-                    if match.p1_series >= math.ceil(match.best_of / 2):
-                        match.winner = p1
-                    update_all()
-
-            p1_gesture = ft.GestureDetector(
-                content=p1_container,
-                on_tap=edit_p1,
-                on_double_tap=double_tap_p1
-            )
+        if minimap.source is not rounds_list:
+            show_minimap(rounds_list)
 
-            def start_drag_p1(e):
-                dragging[0] = p1_container.data
+        if profiler.enabled:
+            profiler.gauge("controls_per_render", count_controls(inner_scroll_row))
 
-            p1_draggable = ft.Draggable(
-                group="player",
-                content=p1_gesture,
-                disabled=p1 is None or match.winner is not None,
-                on_drag_start=start_drag_p1
-            )
-            p1_target = ft.DragTarget(
-                group="player",
-                content=p1_draggable,
-                on_will_accept=lambda e: combined_will_accept(e, match, is_p1=True),
-                on_accept=lambda e: combined_accept(e, match, is_p1=True),
-                on_leave=lambda e: combined_leave(e, match, is_p1=True),
-            )
-            match_widget_controls.append(p1_target)
+        update_all()
 
-        if has_p2_side:
-            p2_text = ft.Text(p2.name if p2 else "", size=text_size, text_align=ft.TextAlign.CENTER)
-            p2_container = ft.Container(content=p2_text, width=cont_width, height=cont_height, padding=ft.padding.all(padding_value), border_radius=20, alignment=ft.alignment.center)
-            p2_container.data = {'player': p2, 'match_id': match.id} if p2 else None
+    def show_minimap(rounds_list):
+        minimap.build(get_layout(1.0), rounds_list)
+        minimap.set_palette(*minimap_palette())
+        minimap_panel.visible = True
+        request_update(minimap_panel)
+
+    def minimap_palette():
+        return (
+            ft.Colors.with_opacity(0.6, theme_vars.get('tbd_color', ft.Colors.GREY)),
+            ft.Colors.GREEN,
+            theme_vars.get('line_color', ft.Colors.BLACK),
+        )
 
-            def edit_p2(e):
-                if not edit_mode or p2 is None:
-                    return
+    def refresh_minimap_viewport():
+        if minimap.source is None:
+            return
+        zoom = zoom_factor["value"]
+        width = bracket_scroll["width"] or page.width or 800
+        height = bracket_scroll["height"] or page.height or 600
+        changed = minimap.show_viewport(
+            bracket_scroll["x"] / zoom, bracket_scroll["y"] / zoom, width / zoom, height / zoom)
+        if changed:
+            request_update(*changed)
+
+    def on_bracket_scroll(e: ft.OnScrollEvent):
+        axis = e.control.data
+        bracket_scroll[axis] = e.pixels or 0.0
+        if e.viewport_dimension:
+            bracket_scroll["width" if axis == "x" else "height"] = e.viewport_dimension
+        refresh_minimap_viewport()
+
+    def scroll_bracket_to(x, y):
+        """Scrolls so the bracket point (x, y), in pixels at the current zoom, is centered."""
+        width = bracket_scroll["width"] or page.width or 800
+        height = bracket_scroll["height"] or page.height or 600
+        bracket_scroll["x"] = max(0.0, x - width / 2)
+        bracket_scroll["y"] = max(0.0, y - height / 2)
+        row = render_pool.get("inner_scroll_row")
+        if row is not None and row.page is not None:
+            row.scroll_to(offset=bracket_scroll["x"], duration=300)
+        column = bracket_scroll["column"]
+        if column is not None and column.page is not None:
+            column.scroll_to(offset=bracket_scroll["y"], duration=300)
+        refresh_minimap_viewport()
+
+    @batched("minimap_jump")
+    def jump_to_minimap(e: ft.TapEvent):
+        if minimap.source is None:
+            return
+        zoom = zoom_factor["value"]
+        x, y = minimap.to_bracket(e.local_x, e.local_y)
+        scroll_bracket_to(x * zoom, y * zoom)
+
+    def ensure_player_index():
+        if player_index_stale[0]:
+            player_index.rebuild(players)
+            player_index_stale[0] = False
+
+    def places_label(places):
+        first, last = places
+        if last == first + 1:
+            return f"{first}º Lugar"
+        return f"{first}º–{last}º Lugar"
+
+    def match_round_label(match):
+        if match.places is not None:
+            return places_label(match.places)
+        rounds_list = rounds_list_global["value"]
+        level = match_graph_global["value"].level[match.id]
+        return get_elim_round_label(len(rounds_list[level]), level, len(rounds_list))
+
+    @timed("search")
+    def on_search_change(e):
+        query = search_field.value or ""
+        found = []
+        if tournament_running and query.strip():
+            ensure_player_index()
+            found = player_index.search(query, limit=len(search_result_buttons))
+        for button_, player_id in zip(search_result_buttons, found + [None] * len(search_result_buttons)):
+            button_.visible = player_id is not None
+            if player_id is None:
+                continue
+            player = player_index.players[player_id]
+            match = player_index.locations.get(player_id)
+            where = match_round_label(match) if match is not None else "—"
+            if match is not None and match.winner is not None and match.winner is not player and not match.is_champion_slot:
+                where += " (eliminado)"
+            elif match is not None and match.winner is None and not match.is_champion_slot:
+                opponent = match.get_player2() if match.get_player1() is player else match.get_player1()
+                if opponent is not None:
+                    where += f" · {ratings.expected(player.name, opponent.name):.0%} contra {opponent.name}"
+            button_.text = f"{player.name} · {where}"
+            button_.data = player_id
+        search_panel.visible = bool(found)
+        request_update(search_panel)
+
+    @batched("search_jump")
+    def jump_to_player(player_id):
+        match = player_index.locations.get(player_id)
+        search_panel.visible = False
+        request_update(search_panel)
+        if match is None or tournament_bracket_container is None:
+            return
+        zoom = zoom_factor["value"]
+        if lod_mode_for(zoom) != "full" and lod_focus["value"] != match.id:
+            lod_focus["value"] = match.id
+            apply_transform()
+        if drill["root"] is not None and match.id not in get_layout(zoom).matches:
+            leave_drill()
+            zoom = zoom_factor["value"]
+        x, y, w, h = get_layout(zoom).matches[match.id]
+        scroll_bracket_to(x + w / 2, y + h / 2)
+
+    def on_search_result(e):
+        jump_to_player(e.control.data)
+
+    def on_search_submit(e):
+        query = search_field.value or ""
+        if not tournament_running or not query.strip():
+            return
+        ensure_player_index()
+        found = player_index.search(query, limit=1)
+        if found:
+            jump_to_player(found[0])
+
+    def match_widget_for(match, scale, mode="full"):
+        """Returns the pooled widget of the match position, rebound to `match` and rescaled."""
+        if mode != "full":
+            view = render_pool.get(("lod", mode, match.id))
+            if view is None:
+                view = render_pool[("lod", mode, match.id)] = create_lod_widget(match, mode, scale)
+            elif view.scale != scale:
+                rescale_lod_widget(view, scale)
+            match.view = view
+            refresh_match(match)
+            return view.widget
+
+        has_sides = (
+            match.player1 is not None or match.previous1 is not None,
+            match.player2 is not None or match.previous2 is not None,
+        )
+        view = render_pool.get(("match", match.id))
+        if view is None or tuple(slot is not None for slot in view.slots) != has_sides:
+            view = render_pool[("match", match.id)] = create_match_widget(match, scale)
+        elif view.scale != scale:
+            rescale_match_widget(view, scale)
+        for slot in view.slots:
+            if slot is not None and slot.container.content is not slot.text:
+                slot.container.content = slot.text
+        match.view = view
+        refresh_match(match)
+        return view.widget
+
+    def rescale_match_widget(view, scale):
+        text_size, cont_width, cont_height, padding_value = slot_metrics(scale)
+        for slot in view.slots:
+            if slot is None:
+                continue
+            slot.text.size = text_size
+            slot.container.width = cont_width
+            slot.container.height = cont_height
+            slot.container.padding = ft.padding.all(padding_value)
+        if isinstance(view.widget, ft.Column):
+            view.widget.spacing = max(6, int(10 * scale))
+        view.scale = scale
+
+    def lod_metrics(mode, scale):
+        width = max(40, int(150 * scale))
+        if mode == "bars":
+            return width, max(4, int(14 * scale)), 0
+        return width, max(16, int(70 * scale)), max(6, int(12 * scale))
+
+    def create_lod_widget(match, mode, scale):
+        width, height, text_size = lod_metrics(mode, scale)
+        text = None
+        if mode == "compact":
+            text = ft.Text("", size=text_size, max_lines=2, no_wrap=True, text_align=ft.TextAlign.CENTER)
+        widget = ft.Container(
+            content=text,
+            width=width,
+            height=height,
+            padding=2 if text else 0,
+            border_radius=6 if text else 3,
+            alignment=ft.alignment.center,
+            data=match.id,
+            on_click=focus_lod_region,
+            on_long_press=drill_lod_region,
+        )
+        return LodView(mode, widget, text, scale)
+
+    def rescale_lod_widget(view, scale):
+        width, height, text_size = lod_metrics(view.mode, scale)
+        view.widget.width = width
+        view.widget.height = height
+        if view.text is not None:
+            view.text.size = text_size
+        view.scale = scale
+
+    def refresh_lod_view(match, view, p1, p2):
+        if match.winner is not None:
+            bgcolor = ft.Colors.GREEN
+            color = ft.Colors.WHITE
+        elif p1 is not None and p2 is not None:
+            bgcolor = theme_vars.get('name_bg', '#FFFFFF')
+            color = theme_vars.get('name_color', '#000000')
+        else:
+            bgcolor = theme_vars.get('tbd_bg', ft.Colors.GREY_200)
+            color = theme_vars.get('tbd_color', ft.Colors.GREY)
+        value = None
+        if view.text is not None:
+            max_chars = max(4, int(view.scale * 20))
+            value = "\n".join(truncate_name(p.name, max_chars) if p else "—" for p in (p1, p2))
+        state = (bgcolor, color, value)
+        if view.rendered == state:
+            return []
+        view.rendered = state
+        view.widget.bgcolor = bgcolor
+        if view.text is None:
+            return [view.widget]
+        view.text.value = value
+        view.text.color = color
+        return [view.widget, view.text]
+
+    @timed("create_match_widget")
+    def create_match_widget(match, scale: float = 1.0):
+        has_sides = (
+            match.player1 is not None or match.previous1 is not None,
+            match.player2 is not None or match.previous2 is not None,
+        )
 
-                def confirm_p2(e):
-                    new_name = e.control.value.strip()
-                    p2_container.content = p2_text
-                    if new_name:
-                        p2.name = new_name
-                        update_all()
-                    else:
-                        page.update()
-
-                def cancel_p2(e):
-                    p2_container.content = p2_text
-                    page.update()
-
-                edit_field = ft.TextField(
-                    value=p2.name,
-                    width=cont_width,
-                    height=cont_height,
-                    border_radius=20,
-                    content_padding=padding_value,
-                    text_align=ft.TextAlign.CENTER,
-                    border_width=0,
-                    on_submit=confirm_p2,
-                    on_blur=cancel_p2
-                )
-                p2_container.content = edit_field
-                page.update()
-                edit_field.focus()
-
-            def double_tap_p2(e):
-                if match.winner is None and p1 and p2:
-                    match.p2_series += 1
-                    if match.p2_series >= math.ceil(match.best_of / 2):
-                        match.winner = p2
-                    update_all()
-
-            p2_gesture = ft.GestureDetector(
-                content=p2_container,
-                on_tap=edit_p2,
-                on_double_tap=double_tap_p2
-            )
+        text_size, cont_width, cont_height, padding_value = slot_metrics(scale)
 
-            def start_drag_p2(e):
-                dragging[0] = p2_container.data
+        view = MatchView(scale)
+        match_widget_controls = []
 
-            p2_draggable = ft.Draggable(
-                group="player",
-                content=p2_gesture,
-                disabled=p2 is None or match.winner is not None,
-                on_drag_start=start_drag_p2
-            )
-            p2_target = ft.DragTarget(
-                group="player",
-                content=p2_draggable,
-                on_will_accept=lambda e: combined_will_accept(e, match, is_p1=False),
-                on_accept=lambda e: combined_accept(e, match, is_p1=False),
-                on_leave=lambda e: combined_leave(e, match, is_p1=False),
+        # handlers are shared by every slot; the slot is identified by control.data
+        for side, has_side in enumerate(has_sides):
+            if not has_side:
+                continue
+            key = (match.id, side)
+            text = ft.Text("", size=text_size, text_align=ft.TextAlign.CENTER)
+            container = ft.Container(content=text, width=cont_width, height=cont_height, padding=ft.padding.all(padding_value), border_radius=20, alignment=ft.alignment.center)
+            # dragging is handled by the pointer layer over the whole bracket
+            gesture = ft.GestureDetector(
+                content=container,
+                data=key,
+                on_tap=on_slot_tap,
+                on_double_tap=on_slot_double_tap,
+                on_secondary_tap=on_slot_secondary_tap,
+                on_long_press_start=on_slot_long_press,
             )
-            match_widget_controls.append(p2_target)
+            view.slots[side] = SlotView(text, container)
+            match_widget_controls.append(gesture)
 
         if len(match_widget_controls) == 2:
-            match_widget = ft.Column(
+            view.widget = ft.Column(
                 match_widget_controls,
                 alignment=ft.MainAxisAlignment.CENTER,
                 horizontal_alignment=ft.CrossAxisAlignment.CENTER,
                 spacing=max(6, int(10 * scale)),
             )
         elif len(match_widget_controls) == 1:
-            match_widget = match_widget_controls[0]
+            view.widget = match_widget_controls[0]
         else:
-            match_widget = ft.Text("Error")
-
-        def update_func():
-            nonlocal p1, p2
-            p1 = match.get_player1()
-            p2 = match.get_player2()
-
-            name_color = theme_vars.get('name_color', '#000000')
-            name_bg = theme_vars.get('name_bg', '#FFFFFF')
-            name_border = theme_vars.get('name_border', None)
-            tbd_color = theme_vars.get('tbd_color', ft.Colors.GREY)
-            tbd_bg = theme_vars.get('tbd_bg', ft.Colors.GREY_200)
-
-            if has_p1_side:
-                p1_text.value = p1.name if p1 else ""
-                p1_container.data = {'player': p1, 'match_id': match.id} if p1 else None
-
-                if p1 is None:
-                    p1_text.color = tbd_color
-                    p1_container.bgcolor = tbd_bg
-                else:
-                    if match.winner == p1:
-                        p1_container.bgcolor = ft.Colors.GREEN
-                        p1_text.color = ft.Colors.WHITE
-                    elif match.winner is not None:
-                        p1_container.bgcolor = ft.Colors.RED
-                        p1_text.color = ft.Colors.WHITE
-                    else:
-                        p1_container.bgcolor = name_bg
-                        if not has_p2_side:
-                            p1_text.color = ft.Colors.GREEN
-                        else:
-                            p1_text.color = name_color
-
-                p1_container.border = name_border
-                p1_draggable.disabled = p1 is None or match.winner is not None
-
-            if has_p2_side:
-                p2_text.value = p2.name if p2 else ""
-                p2_container.data = {'player': p2, 'match_id': match.id} if p2 else None
-
-                if p2 is None:
-                    p2_text.color = tbd_color
-                    p2_container.bgcolor = tbd_bg
-                else:
-                    if match.winner == p2:
-                        p2_container.bgcolor = ft.Colors.GREEN
-                        p2_text.color = ft.Colors.WHITE
-                    elif match.winner is not None:
-                        p2_container.bgcolor = ft.Colors.RED
-                        p2_text.color = ft.Colors.WHITE
-                    else:
-                        p2_container.bgcolor = name_bg
-                        if not has_p1_side:
-                            p2_text.color = ft.Colors.GREEN
-                        else:
-                            p2_text.color = name_color
-
-                p2_container.border = name_border
-                p2_draggable.disabled = p2 is None or match.winner is not None
-
-            if getattr(match, "is_champion_slot", False):
-                champ_player = p1
-                if champ_player and not match._had_winner:
-                    match._had_winner = True
-                    page.run_task(trigger_confetti)
-                elif not champ_player:
-                    match._had_winner = False
-
-        match.update_func = update_func
-
-        update_func()
-
-        return match_widget
-
-    def combined_will_accept(e, match, is_p1):
-        source_data = dragging[0]
-        if source_data is None:
-            return False
+            view.widget = ft.Text("Error")
+
+        return view
+
+    def render_slot(slot, player, winner, color, bgcolor, border, changed, wins=None):
+        # only the properties that differ from the last rendered state are written
+        value = player.name if player else ""
+        if player is not None and player.withdrawn:
+            value += " (W.O.)"
+        elif wins is not None:
+            value += f"  {wins}"
+        state = (value, color, bgcolor, border)
+        last = slot.rendered
+        if last == state:
+            return
+        slot.rendered = state
+        if last is None or last[0] != value or last[1] != color:
+            slot.text.value = value
+            slot.text.color = color
+            changed.append(slot.text)
+        if last is None or last[2] != bgcolor or last[3] != border:
+            slot.container.bgcolor = bgcolor
+            slot.container.border = border
+            changed.append(slot.container)
+
+    def refresh_match(match):
+        """Brings the match widget in line with the match state; returns the controls that changed."""
+        p1 = match.get_player1()
+        p2 = match.get_player2()
+        if isinstance(match.view, LodView):
+            changed = refresh_lod_view(match, match.view, p1, p2)
+            check_champion(match, p1)
+            return changed
+        slot1, slot2 = match.view.slots
+
+        name_color = theme_vars.get('name_color', '#000000')
+        name_bg = theme_vars.get('name_bg', '#FFFFFF')
+        name_border = theme_vars.get('name_border', None)
+        tbd_color = theme_vars.get('tbd_color', ft.Colors.GREY)
+        tbd_bg = theme_vars.get('tbd_bg', ft.Colors.GREY_200)
+
+        changed = []
+
+        series = match.best_of > 1 and p1 is not None and p2 is not None
+        for slot, player, alone, wins in ((slot1, p1, slot2 is None, match.p1_series), (slot2, p2, slot1 is None, match.p2_series)):
+            if slot is None:
+                continue
+            if player is None:
+                color, bgcolor = tbd_color, tbd_bg
+            elif match.winner == player:
+                color, bgcolor = ft.Colors.WHITE, ft.Colors.GREEN
+            elif match.winner is not None:
+                color, bgcolor = ft.Colors.WHITE, ft.Colors.RED
+            else:
+                color = ft.Colors.GREEN if alone else name_color
+                bgcolor = name_bg
+            render_slot(slot, player, match.winner, color, bgcolor, name_border, changed, wins if series else None)
+
+        check_champion(match, p1)
+        return changed
+
+    def check_champion(match, champ_player):
+        if getattr(match, "is_champion_slot", False):
+            if champ_player and not match._had_winner:
+                match._had_winner = True
+                page.run_task(trigger_confetti)
+            elif not champ_player:
+                match._had_winner = False
+
+    def slot_player(match, side):
+        return match.get_player1() if side == 0 else match.get_player2()
+
+    @batched("edit_name")
+    def edit_slot(e, match, side):
+        player = slot_player(match, side)
+        if not edit_mode or player is None:
+            return
+        slot = match.view.slots[side]
+        edit_field = ft.TextField(
+            value=player.name,
+            width=slot.container.width,
+            height=slot.container.height,
+            border_radius=20,
+            content_padding=slot.container.padding,
+            text_align=ft.TextAlign.CENTER,
+            border_width=0,
+            data=e.control.data,
+            on_submit=on_slot_edit_submit,
+            on_blur=on_slot_edit_cancel,
+        )
+        slot.container.content = edit_field
+        request_update(slot.container)
+        scheduler.flush()
+        edit_field.focus()
 
-        try:
-            container = e.control.content.content.content
-        except Exception:
-            container = None
+    @batched("confirm_edit")
+    def confirm_slot_edit(e, match, side):
+        slot = match.view.slots[side]
+        player = slot_player(match, side)
+        new_name = e.control.value.strip()
+        slot.container.content = slot.text
+        if new_name and player is not None:
+            rename_player(player, new_name)
+            update_all()
+        request_update(slot.container)
 
-        if match.parent and source_data['match_id'] == match.parent.id and match.winner is not None:
-            if container is not None:
-                container.border = ft.border.all(2, ft.Colors.RED)
-                e.control.update()
-            return True
+    @batched("cancel_edit")
+    def cancel_slot_edit(e, match, side):
+        slot = match.view.slots[side]
+        slot.container.content = slot.text
+        request_update(slot.container)
 
-        if (is_p1 and match.get_player1() is not None) or (not is_p1 and match.get_player2() is not None):
-            return False
-        previous = match.previous1 if is_p1 else match.previous2
-        if previous is None:
-            return False
-        if source_data['match_id'] != previous.id:
-            return False
-        if source_data['player'] != previous.get_player1() and source_data['player'] != previous.get_player2():
-            return False
-        if container is not None:
-            container.border = ft.border.all(2, ft.Colors.BLACK)
-            e.control.update()
-        return True
+    @batched("result")
+    def double_tap_slot(e, match, side):
+        p1 = match.get_player1()
+        p2 = match.get_player2()
+        if match.winner is None and p1 and p2 and not replay_state["active"]:
+            match.add_game(side)
+            decide_series(match)
+            settle([match])
+
+    def decide_series(match):
+        """Sets the winner of a match from its games: whoever has the wins needed, else nobody."""
+        needed = match.wins_needed()
+        if match.p1_series >= needed:
+            match.winner = match.get_player1()
+        elif match.p2_series >= needed:
+            match.winner = match.get_player2()
+        else:
+            match.winner = None
 
-    def combined_accept(e, match, is_p1):
-        source_data = dragging[0]
-        if source_data is None:
+    def legal_drop_targets(match):
+        """Slots a player dragged out of `match` may be dropped on, mapped to the drop action."""
+        targets = {}
+        parent = match.parent
+        if parent is not None and not parent.use_losers:
+            side = 0 if parent.previous1 is match else 1
+            if slot_player(parent, side) is None:
+                targets[(parent.id, side)] = "advance"
+        for previous in (match.previous1, match.previous2):
+            if previous is not None and previous.parent is match and previous.winner is not None:
+                targets[(previous.id, 0)] = "revert"
+                targets[(previous.id, 1)] = "revert"
+        return targets
+
+    def set_drop_highlight(key, action):
+        """Highlights the slot under the pointer, or restores its rendered border when action is None."""
+        match_id, side = key
+        view = all_matches[match_id].view if match_id < len(all_matches) else None
+        slot = view.slots[side] if view is not None else None
+        if slot is None or slot.rendered is None:
             return
-
-        if match.parent and source_data['match_id'] == match.parent.id:
-            match.winner = None
-            update_all()
+        if action is None:
+            slot.container.border = slot.rendered[3]
+        else:
+            slot.container.border = ft.border.all(2, ft.Colors.RED if action == "revert" else ft.Colors.BLACK)
+        request_update(slot.container)
+
+    def move_drag_ghost(x, y):
+        drag_ghost.left = int(x) + 12
+        drag_ghost.top = int(y) + 12
+        request_update(drag_ghost)
+
+    @timed("drag_start")
+    def on_bracket_pan_start(e):
+        drag_state.update(source=None, player=None, targets={}, hover=None)
+        if replay_state["active"]:
             return
-
-        previous = match.previous1 if is_p1 else match.previous2
-        if previous and previous.id == source_data['match_id']:
-            previous.winner = source_data['player']
-            update_all()
-
-    def combined_leave(e, match, is_p1):
-        try:
-            container = e.control.content.content.content
-            container.border = theme_vars.get('name_border', None)
-            e.control.update()
-        except Exception:
-            pass
+        hit = get_layout(zoom_factor["value"]).slot_at(e.local_x, e.local_y)
+        if hit is None or hit[0] >= len(all_matches):
+            return
+        match = all_matches[hit[0]]
+        if match.view is None or match.view.slots[hit[1]] is None:
+            return
+        player = slot_player(match, hit[1])
+        if player is None or match.winner is not None:
+            return
+        targets = legal_drop_targets(match)
+        if not targets:
+            return
+        drag_state.update(source=match, player=player, targets=targets)
+        drag_ghost.content.value = player.name
+        drag_ghost.visible = True
+        move_drag_ghost(e.local_x, e.local_y)
+
+    @timed("drag_update")
+    def on_bracket_pan_update(e):
+        if drag_state["source"] is None:
+            return
+        move_drag_ghost(e.local_x, e.local_y)
+        hit = get_layout(zoom_factor["value"]).slot_at(e.local_x, e.local_y)
+        hover = hit if hit in drag_state["targets"] else None
+        if hover != drag_state["hover"]:
+            if drag_state["hover"] is not None:
+                set_drop_highlight(drag_state["hover"], None)
+            if hover is not None:
+                set_drop_highlight(hover, drag_state["targets"][hover])
+            drag_state["hover"] = hover
+
+    @timed("drag_accept")
+    @batched("drop")
+    def on_bracket_pan_end(e):
+        source, player, hover = drag_state["source"], drag_state["player"], drag_state["hover"]
+        action = drag_state["targets"].get(hover)
+        drag_state.update(source=None, player=None, targets={}, hover=None)
+        drag_ghost.visible = False
+        request_update(drag_ghost)
+        if hover is None or source is None:
+            return
+        set_drop_highlight(hover, None)
+        if action == "advance":
+            source.winner = player
+            settle([source])
+        elif action == "revert":
+            reverted = all_matches[hover[0]]
+            reverted.winner = None
+            settle([reverted])
+
+    def slot_event(handler):
+        """Adapts a (e, match, side) handler into an event handler shared by every slot."""
+        def dispatch(e):
+            match_id, side = e.control.data
+            if match_id is None or match_id >= len(all_matches):
+                return None
+            match = all_matches[match_id]
+            if match.view is None or match.view.slots[side] is None:
+                return None
+            return handler(e, match, side)
+        return dispatch
+
+    on_slot_tap = slot_event(edit_slot)
+    on_slot_double_tap = slot_event(double_tap_slot)
+    on_slot_edit_submit = slot_event(confirm_slot_edit)
+    on_slot_edit_cancel = slot_event(cancel_slot_edit)
+    on_slot_secondary_tap = slot_event(lambda e, match, side: enter_drill(match))
+    on_slot_long_press = slot_event(lambda e, match, side: confirm_withdrawal(e, match, side) if edit_mode else open_series(e, match, side))
 
     nome_input = ft.TextField(
         label="Digite nomes aqui",
@@ -1101,6 +3946,33 @@ def main(page: ft.Page):
         on_submit=add_name,
     )
 
+    search_field = ft.TextField(
+        label="Buscar jogador",
+        width=220,
+        dense=True,
+        border_radius=10,
+        prefix_icon=ft.Icons.SEARCH,
+        visible=False,
+        on_change=on_search_change,
+        on_submit=on_search_submit,
+    )
+    search_result_buttons = [ft.TextButton("", visible=False, on_click=on_search_result) for _ in range(8)]
+    search_panel = ft.Container(
+        content=ft.Container(
+            content=ft.Column(search_result_buttons, spacing=0, tight=True),
+            width=320,
+            padding=6,
+            border_radius=10,
+            bgcolor=ft.Colors.SURFACE,
+            shadow=ft.BoxShadow(blur_radius=8, color=ft.Colors.with_opacity(0.3, ft.Colors.BLACK)),
+        ),
+        top=80,
+        left=0,
+        right=0,
+        alignment=ft.alignment.top_center,
+        visible=False,
+    )
+
     theme_dropdown = ft.Dropdown(
         label="Tema",
         options=[ft.dropdown.Option(t) for t in ["Branco", "Preto", "Ciano", "Roxo", "Neon", "Vermelho", "Carmesin", "Midnight Galaxy", "Blush Dawn", "Void Amethyst"]],
@@ -1108,6 +3980,8 @@ def main(page: ft.Page):
         width=200,
     )
 
+    @timed("apply_theme")
+    @batched("apply_theme")
     def apply_theme(e):
         theme = theme_dropdown.value
         gradient = None
@@ -1379,10 +4253,23 @@ def main(page: ft.Page):
                 btn.color = button_color
         nome_input.bgcolor = input_bg
         nome_input.border_color = input_border
+        search_field.bgcolor = input_bg
+        search_field.border_color = input_border
+        draw_seed_field.bgcolor = input_bg
+        draw_seed_field.border_color = input_border
+        category_field.bgcolor = input_bg
+        category_field.border_color = input_border
         if dropdown_border:
             theme_dropdown.border_color = dropdown_border
         else:
             theme_dropdown.border_color = None
+        lod_dropdown.border_color = theme_dropdown.border_color
+        placement_dropdown.border_color = theme_dropdown.border_color
+        category_dropdown.border_color = theme_dropdown.border_color
+        minimap_panel.bgcolor = ft.Colors.with_opacity(0.9, container_bg)
+        minimap_changed = minimap.set_palette(*minimap_palette())
+        if minimap_changed:
+            request_update(minimap_panel, *minimap_changed)
 
         if tournament_running:
             update_all()
@@ -1422,7 +4309,6 @@ def main(page: ft.Page):
             elif isinstance(ctrl, ft.Container):
                 ctrl.content.color = text_color
 
-        page.update()
         apply_transform()
 
     theme_dropdown.on_change = apply_theme
@@ -1430,8 +4316,8 @@ def main(page: ft.Page):
     top_part = ft.Container(
         content=ft.Column(
             [
-                ft.Row([theme_dropdown, third_place_checkbox], alignment=ft.MainAxisAlignment.CENTER),
-                ft.Row([nome_input], alignment=ft.MainAxisAlignment.CENTER),
+                ft.Row([theme_dropdown, lod_dropdown, placement_dropdown, collapse_byes_checkbox, rating_seeds_checkbox, draw_seed_field, search_field], alignment=ft.MainAxisAlignment.CENTER),
+                ft.Row([category_dropdown, nome_input, category_field], alignment=ft.MainAxisAlignment.CENTER),
                 ft.Row(buttons, alignment=ft.MainAxisAlignment.CENTER, spacing=10),
             ],
             spacing=10,
@@ -1443,19 +4329,435 @@ def main(page: ft.Page):
         shadow=ft.BoxShadow(blur_radius=10),
     )
 
-    bottom_part = ft.Container(
+    hud_text = ft.Text("", font_family="monospace", size=11, color=ft.Colors.GREEN_ACCENT_200, selectable=True)
+    hud_status = ft.Text("", size=11, color=ft.Colors.WHITE70)
+    hud = ft.Container(
         content=ft.Column(
-            [],
-            expand=True,
-            horizontal_alignment=ft.CrossAxisAlignment.CENTER,
-            alignment=ft.MainAxisAlignment.START,
-            scroll=ft.ScrollMode.AUTO,
+            [
+                ft.Row(
+                    [
+                        ft.Text("Desempenho", size=12, weight=ft.FontWeight.BOLD, color=ft.Colors.WHITE),
+                        ft.TextButton("Zerar", on_click=lambda e: reset_profile(e)),
+                        ft.TextButton("💾 Salvar", on_click=lambda e: dump_profile(e)),
+                    ],
+                    spacing=4,
+                ),
+                hud_text,
+                hud_status,
+            ],
+            spacing=2,
+            tight=True,
         ),
-        expand=True,
-        border_radius=15,
-        padding=20,
+        right=10,
+        top=10,
+        padding=10,
+        border_radius=8,
+        bgcolor=ft.Colors.with_opacity(0.85, ft.Colors.BLACK),
+        visible=False,
+    )
+
+    # the minimap of every category with a cached bracket; only the active one is visible
+    minimap_stack = ft.Stack([minimap.canvas])
+    minimap_panel = ft.Container(
+        content=ft.GestureDetector(content=minimap_stack, on_tap_down=jump_to_minimap),
+        right=20,
+        bottom=20,
+        padding=6,
+        border_radius=8,
+        shadow=ft.BoxShadow(blur_radius=6, color=ft.Colors.with_opacity(0.3, ft.Colors.BLACK)),
+        tooltip="Clique para ir até a região",
+        visible=False,
+    )
+
+    build_progress = ft.ProgressBar(width=260, value=0)
+    build_progress_text = ft.Text("", size=12)
+    build_panel = ft.Container(
+        content=ft.Container(
+            content=ft.Row(
+                [
+                    ft.Column([build_progress_text, build_progress], spacing=4, tight=True),
+                    ft.TextButton("Cancelar", on_click=on_cancel_build),
+                ],
+                tight=True,
+            ),
+            padding=12,
+            border_radius=10,
+            bgcolor=ft.Colors.SURFACE,
+            shadow=ft.BoxShadow(blur_radius=8, color=ft.Colors.with_opacity(0.3, ft.Colors.BLACK)),
+        ),
+        left=0,
+        right=0,
+        bottom=20,
+        alignment=ft.alignment.bottom_center,
+        visible=False,
+    )
+
+    hud_ticker = {"running": False}
+
+    async def refresh_hud():
+        try:
+            while hud.visible:
+                hud_text.value = profiler.format() + "\n\n" + scheduler.summary()
+                request_update(hud_text)
+                await asyncio.sleep(0.5)
+        finally:
+            hud_ticker["running"] = False
+
+    courts_count_field = ft.TextField(label="Quadras", value="0", width=80, dense=True)
+    courts_duration_field = ft.TextField(label="Min/jogo", value="20", width=80, dense=True)
+    courts_rest_field = ft.TextField(label="Descanso", value="10", width=80, dense=True)
+    call_list_text = ft.Text("", font_family="monospace", size=12, selectable=True)
+    courts_panel = ft.Container(
+        content=ft.Column(
+            [
+                ft.Row(
+                    [courts_count_field, courts_duration_field, courts_rest_field, ft.TextButton("Aplicar", on_click=lambda e: apply_courts(e))],
+                    spacing=6,
+                ),
+                call_list_text,
+            ],
+            spacing=8,
+            tight=True,
+        ),
+        left=20,
+        bottom=20,
+        width=420,
+        padding=10,
+        border_radius=10,
+        bgcolor=ft.Colors.SURFACE,
+        shadow=ft.BoxShadow(blur_radius=8, color=ft.Colors.with_opacity(0.3, ft.Colors.BLACK)),
+        visible=False,
+    )
+
+    def courts_setting(field, default):
+        try:
+            return max(0, int(field.value))
+        except (TypeError, ValueError):
+            field.value = str(default)
+            return default
+
+    def new_court_scheduler():
+        count = courts_setting(courts_count_field, 0)
+        if count == 0:
+            return None
+        return CourtScheduler(count, courts_setting(courts_duration_field, 20) * 60, courts_setting(courts_rest_field, 10) * 60)
+
+    def show_call_list(now):
+        courts = courts_global["value"]
+        if courts is None:
+            call_list_text.value = "Defina o número de quadras e toque em Aplicar."
+        else:
+            lines = []
+            for court, match, start, end in courts.call_list(now):
+                when = "agora" if match.id in courts.court_of else time.strftime("%H:%M", time.localtime(start))
+                lines.append(f"Q{court + 1} {when:>5}  {match.get_player1().name} x {match.get_player2().name} (até {time.strftime('%H:%M', time.localtime(end))})")
+            waiting = len(courts.queued)
+            lines.append(f"{waiting} na fila · {len(courts.finished)} jogos · {courts.per_hour(now):.1f} jogos/h")
+            call_list_text.value = "\n".join(lines)
+        request_update(call_list_text)
+
+    @batched("courts")
+    def toggle_courts_panel(e):
+        courts_panel.visible = not courts_panel.visible
+        request_update(courts_panel)
+        if courts_panel.visible:
+            show_call_list(time.time())
+
+    @batched("courts")
+    def apply_courts(e):
+        """Starts the courts over with the settings, calling the matches ready now."""
+        leave_replay()
+        courts_global["value"] = None
+        request_update(courts_count_field, courts_duration_field, courts_rest_field)
+        if match_graph_global["value"] is not None:
+            courts_global["value"] = new_court_scheduler()
+            schedule_matches(match_graph_global["value"].order)
+        show_call_list(time.time())
+
+    replay_slider = ft.Slider(min=0, max=1, value=0, width=360, on_change=lambda e: on_replay_slide(e))
+    replay_time_text = ft.Text("", size=12)
+    replay_panel = ft.Container(
+        content=ft.Row(
+            [
+                ft.Column([replay_time_text, replay_slider], spacing=0, tight=True),
+                ft.TextButton("Ao vivo", on_click=lambda e: leave_replay(e)),
+            ],
+            tight=True,
+        ),
+        top=210,
+        left=0,
+        right=0,
+        alignment=ft.alignment.top_center,
+        padding=8,
+        border_radius=10,
+        bgcolor=ft.Colors.SURFACE,
+        visible=False,
     )
 
+    def show_replay_position():
+        log = result_log_global["value"]
+        position = replay_state["position"]
+        if position == 0:
+            replay_time_text.value = f"Início · 0/{len(log)}"
+        else:
+            moment = time.strftime("%d/%m %H:%M:%S", time.localtime(log.times[position - 1]))
+            replay_time_text.value = f"{moment} · {position}/{len(log)}"
+        request_update(replay_time_text)
+
+    def seek_replay(count):
+        """Shows the bracket as it was after `count` results, refreshing only the
+        matches whose winner changed between the two positions. Costs fewer than
+        keyframe_every events plus the events between the positions."""
+        log = result_log_global["value"]
+        if log is None:
+            return
+        known = replay_state["players"]
+        low, high = sorted((replay_state["position"], count))
+        changed = []
+        for match_id, winner_id in log.winners_at(count, log.touched(low, high)).items():
+            match = all_matches[match_id]
+            winner = known.get(winner_id)
+            if match.winner is not winner:
+                match.winner = winner
+                changed.append(match)
+        replay_state["position"] = count
+        settle(changed)
+        show_replay_position()
+
+    @batched("replay")
+    def enter_replay(e):
+        log = result_log_global["value"]
+        if replay_state["active"] or log is None or build_state["token"] is not None:
+            return
+        # seeking re-evaluates the matches (clearing series, deciding byes), so what the
+        # results do not log is kept aside and put back when leaving
+        saved = [(m.winner, m.games, m.games_played, m._had_winner, m.auto_winner) for m in all_matches]
+        replay_state.update(active=True, position=len(log), players={p.id: p for p in players}, saved=saved)
+        replay_slider.max = max(1, len(log))
+        replay_slider.value = len(log)
+        replay_panel.visible = True
+        request_update(replay_panel)
+        show_replay_position()
+
+    @timed("replay_seek")
+    @batched("replay")
+    def on_replay_slide(e):
+        if replay_state["active"]:
+            seek_replay(min(replay_slider.max, int(round(e.control.value))))
+
+    @batched("replay")
+    def leave_replay(e=None):
+        if not replay_state["active"]:
+            return
+        saved = replay_state["saved"]
+        changed = []
+        for match, (winner, games, games_played, had_winner, auto_winner) in zip(all_matches, saved):
+            if match.winner is not winner:
+                match.winner = winner
+                changed.append(match)
+        settle(changed)
+        # after settling: a match whose sides came back has its games cleared on the way
+        restored = []
+        for match, (winner, games, games_played, had_winner, auto_winner) in zip(all_matches, saved):
+            match._had_winner = had_winner
+            match.auto_winner = auto_winner
+            if match.games != games or match.games_played != games_played:
+                match.games, match.games_played = games, games_played
+                restored.append(match)
+        refresh_matches(restored)
+        replay_state.update(active=False, players={}, saved=None)
+        replay_panel.visible = False
+        request_update(replay_panel)
+
+    leaderboard_limit = 100  # rows on screen; exports have everyone
+    leaderboard_list = ft.ListView(spacing=2, height=360, width=460)
+    leaderboard_status = ft.Text("", size=11)
+    leaderboard_dialog = ft.AlertDialog(
+        title=ft.Text("Classificação"),
+        content=ft.Column([leaderboard_list, leaderboard_status], tight=True),
+        actions=[
+            ft.TextButton("CSV", on_click=lambda e: export_standings("csv")),
+            ft.TextButton("JSON", on_click=lambda e: export_standings("json")),
+            ft.TextButton("Fechar", on_click=lambda e: page.close(leaderboard_dialog)),
+        ],
+    )
+
+    def show_leaderboard_rows():
+        standings = standings_global["value"]
+        if standings is None:
+            leaderboard_list.controls = [ft.Text("Inicie o torneio para ver a classificação.")]
+        else:
+            leaderboard_list.controls = [
+                ft.Text(
+                    f"{place}º  {player.name}  ({first}º–{last}º)  {player.score}V {player.losses}D"
+                    if last != first else f"{place}º  {player.name}  {player.score}V {player.losses}D"
+                )
+                for place, player, first, last in standings.rows(leaderboard_limit)
+            ]
+        request_update(leaderboard_list)
+
+    @batched("leaderboard")
+    def show_leaderboard(e):
+        if standings_global["value"] is not None:
+            # names and ratings may have changed since the last result
+            standings_global["value"].rebuild()
+        leaderboard_status.value = ""
+        show_leaderboard_rows()
+        page.open(leaderboard_dialog)
+
+    @batched("leaderboard")
+    def export_standings(kind):
+        standings = standings_global["value"]
+        if standings is None:
+            return
+        path = os.path.abspath(time.strftime(f"tornify_classificacao_%Y%m%d_%H%M%S.{kind}"))
+        try:
+            if kind == "csv":
+                standings.export_csv(path)
+            else:
+                standings.export_json(path)
+            leaderboard_status.value = f"Salvo em {path}"
+        except OSError as ex:
+            leaderboard_status.value = f"Erro ao salvar: {ex}"
+        request_update(leaderboard_status)
+
+    history_list = ft.ListView(spacing=2, height=360, width=460)
+    history_dialog = ft.AlertDialog(
+        title=ft.Text("Histórico da temporada"),
+        content=history_list,
+        actions=[
+            ft.TextField(label="K do rating", value=f"{ratings.k:g}", width=110, dense=True, on_submit=lambda e: change_rating_k(e)),
+            ft.TextButton("Fechar", on_click=lambda e: page.close(history_dialog)),
+        ],
+    )
+    history_season_days = 365
+
+    def loaded_brackets():
+        """(MatchGraph, history tournament) of the bracket on screen and of every saved category."""
+        states = [{"graph": match_graph_global["value"], "history": history_state}]
+        states.extend(categories["saved"].values())
+        return [(state["graph"], state["history"]["tournament"]) for state in states if state["graph"] is not None]
+
+    def recompute_ratings(on_done=None):
+        """Replays the stored results into the ratings on the history thread, then puts
+        the live results of the loaded brackets back on top on the event loop."""
+        brackets = loaded_brackets()
+        live = [tournament for _, tournament in brackets if tournament is not None]
+
+        def replayed(values):
+            ratings.ratings = values
+            for graph, _ in loaded_brackets():
+                for match in graph.order:
+                    if match.credited is not None and not match.is_champion_slot:
+                        winner, loser = match.credited
+                        match.rating_delta = ratings.update(winner.name, loser.name)
+            if on_done is not None:
+                on_done()
+
+        history.games(lambda games: on_loop(replayed, ratings.replay(*games)), exclude=live, on_error=history_failed)
+
+    @batched("history")
+    def change_rating_k(e):
+        try:
+            k = float(e.control.value.replace(",", "."))
+        except ValueError:
+            k = 0
+        if k <= 0:
+            e.control.value = f"{ratings.k:g}"
+            request_update(e.control)
+            return
+        ratings.k = k
+        history_list.controls = [ft.ProgressRing()]
+        request_update(history_list)
+        recompute_ratings(on_done=lambda: show_history(None))
+
+    def on_loop(fn, *args):
+        """Runs fn(*args) as an action on the event loop. History callbacks come in on
+        the worker thread and hand their results over with this."""
+        async def run_on_loop():
+            with scheduler.action("history"):
+                fn(*args)
+        page.run_task(run_on_loop)
+
+    def show_history_rows(controls):
+        history_list.controls = controls
+        request_update(history_list)
+
+    def history_failed(ex):
+        on_loop(show_history_rows, [ft.Text(f"Erro ao ler o histórico: {ex}", color=ft.Colors.RED)])
+
+    @batched("history")
+    def show_history(e):
+        history_dialog.title.value = "Histórico da temporada"
+        history_list.controls = [ft.ProgressRing()]
+        page.open(history_dialog)
+
+        def standings(rows):
+            if not rows:
+                show_history_rows([ft.Text("Nenhum resultado registrado.")])
+                return
+            show_history_rows([
+                ft.TextButton(
+                    f"{name} ({ratings.rating(name):.0f}) — {titles} título(s), {wins}V {losses}D em {entered} torneio(s)",
+                    data=name,
+                    on_click=lambda ev: show_player_history(ev.control.data),
+                )
+                for name, entered, titles, wins, losses in rows
+            ])
+
+        history.season(
+            time.time() - history_season_days * 86400,
+            lambda rows: on_loop(standings, rows),
+            on_error=history_failed,
+        )
+
+    @batched("history")
+    def show_player_history(name):
+        history_dialog.title.value = name
+        history_list.controls = [ft.ProgressRing()]
+        request_update(history_dialog)
+
+        def results(rows):
+            lines = [ft.TextButton("⬅️ Temporada", on_click=show_history)]
+            for decided_at, round_label, opponent, won, score, walkover in rows:
+                outcome = "V" if won else "D"
+                detail = "W.O." if walkover else (score or "")
+                lines.append(ft.Text(f"{time.strftime('%d/%m/%Y', time.localtime(decided_at))}  {round_label}: {outcome} x {opponent} {detail}"))
+            show_history_rows(lines)
+
+        history.history(name, 50, lambda rows: on_loop(results, rows), on_error=history_failed)
+
+    @batched("toggle_hud")
+    def toggle_hud(e=None):
+        hud.visible = not hud.visible
+        profiler.enabled = hud.visible or os.environ.get("TORNIFY_PROFILE") == "1"
+        request_update(hud)
+        if hud.visible and not hud_ticker["running"]:
+            # a loop from before a quick close and reopen is still sleeping: it carries on
+            hud_ticker["running"] = True
+            page.run_task(refresh_hud)
+
+    @batched("toggle_hud")
+    def reset_profile(e):
+        profiler.reset()
+        hud_status.value = ""
+        request_update(hud)
+
+    @batched("toggle_hud")
+    def dump_profile(e):
+        path = os.path.abspath(time.strftime("tornify_profile_%Y%m%d_%H%M%S.json"))
+        try:
+            profiler.dump(path, extra={"players": len(players), "scheduler": scheduler.stats()})
+            hud_status.value = f"Salvo em {path}"
+        except OSError as ex:
+            hud_status.value = f"Erro ao salvar: {ex}"
+        request_update(hud)
+
+    bottom_part = new_category_host()
+
+    # one host per category with a cached bracket; only the active one is visible
+    workspace = ft.Stack([bottom_part], expand=True, fit=ft.StackFit.EXPAND)
+
     main_container = ft.Container(
         expand=True,
         content=ft.Stack(
@@ -1463,18 +4765,27 @@ def main(page: ft.Page):
                 ft.Column(
                     [
                         top_part,
-                        bottom_part,
+                        workspace,
                     ],
                     spacing=0,
                     expand=True,
                     horizontal_alignment=ft.CrossAxisAlignment.STRETCH,
                 ),
+                minimap_panel,
+                courts_panel,
+                replay_panel,
+                build_panel,
+                search_panel,
                 overlay,
+                hud,
             ]
         ),
     )
 
     page.add(main_container)
+    if history is not None:
+        page.on_disconnect = lambda e: history.close()
+        recompute_ratings()
 
     title_text = ft.Text("🧠 Como usar:", size=18, weight=ft.FontWeight.BOLD)
     close_button = ft.IconButton(ft.Icons.CLOSE, on_click=lambda e: close_tutorial(e))
@@ -1498,22 +4809,49 @@ def main(page: ft.Page):
         example_container,
         ft.Text("● 🏁 Botão Iniciar", size=16, weight=ft.FontWeight.BOLD),
         ft.Text(" ⚬ Inicia o torneio eliminatório, criando automaticamente os confrontos, semifinais e final, até definir o campeão."),
+        ft.Text(" ⚬ Em “Nova categoria” digite um nome e pressione Enter para abrir outra chave (ex.: Sub-15, Adulto); cada categoria tem seus próprios participantes e resultados, e o menu “Categoria” alterna entre elas na hora."),
+        ft.Text(" ⚬ Em “Colocações” escolha até onde as posições são disputadas: só o 3º lugar, até o 8º (5º–8º e 7º lugar) ou todas, com chaves de consolação para quem perdeu em cada rodada, até o último colocado."),
+        ft.Text(" ⚬ Com “Ocultar byes”, quem não tem adversário na primeira rodada já aparece direto na segunda, deixando a chave bem mais curta."),
+        ft.Text(" ⚬ Em torneios grandes a chave aparece rodada por rodada, com uma barra de progresso; “Cancelar” interrompe e volta para a edição."),
         ft.Text("● 🎲 Botão Randomizar", size=16, weight=ft.FontWeight.BOLD),
         ft.Text(" ⚬ Mistura completamente a ordem dos participantes, criando novas combinações aleatórias a cada clique."),
+        ft.Text(" ⚬ Preencha “Semente” para repetir exatamente o mesmo sorteio; sem semente, a usada aparece no aviso para conferência."),
         ft.Text("● ✏️ Botão Editar", size=16, weight=ft.FontWeight.BOLD),
         ft.Text(" ⚬ Clique esquerdo sobre um nome → editar e pressionar Enter para confirmar."),
         ft.Text(" ⚬ Clique direito → apagar o participante (disponível antes de iniciar o torneio ou após voltar ao modo de edição)."),
+        ft.Text(" ⚬ Com o torneio em andamento, clique longo num jogador → registra a desistência; o adversário avança por W.O. e os resultados são mantidos."),
+        ft.Text("● ➕ Inscrição Tardia", size=16, weight=ft.FontWeight.BOLD),
+        ft.Text(" ⚬ Com o torneio em andamento, digite o nome e pressione Enter: o jogador entra na próxima vaga de bye (na ordem dos cabeças de chave), sem refazer a chave."),
         ft.Text("● 🔁 Botão Resetar", size=16, weight=ft.FontWeight.BOLD),
         ft.Text(" ⚬ Remove todos os participantes e reinicia o torneio do zero."),
         ft.Text("● ⏪ Botão “Voltar para Edição”", size=16, weight=ft.FontWeight.BOLD),
         ft.Text(" ⚬ Retorna à tela inicial para editar ou adicionar novos participantes antes de reiniciar o torneio."),
         ft.Text("● 🏆 Progressão pelo Torneio", size=16, weight=ft.FontWeight.BOLD),
-        ft.Text(" ⚬ Dois cliques sobre um participante → avança ele para o próximo round."),
+        ft.Text(" ⚬ Dois cliques sobre um participante → avança ele para o próximo round (em séries, conta um jogo para ele)."),
+        ft.Text(" ⚬ Em “🎯 Séries” escolha melhor de 1, 3, 5 ou 7 para cada rodada; o placar da série aparece ao lado dos nomes."),
+        ft.Text(" ⚬ Clique longo num confronto (fora do modo de edição) → lança o placar da série de uma vez (ex.: 3-2) ou desfaz o último jogo."),
         ft.Text(" ⚬ Arrastar e soltar → move o participante para outro slot (mesmo sem oponente, propositalmente)."),
         ft.Text(" ⚬ Arrastar para trás → reverte o resultado do confronto anterior."),
         ft.Text("● 🔍 Zoom e Scroll", size=16, weight=ft.FontWeight.BOLD),
         ft.Text(" ⚬ Use os botões de lupa ou Ctrl + Roda do Mouse para dar zoom."),
         ft.Text(" ⚬ O scroll vertical e horizontal se ajusta automaticamente ao tamanho do bracket."),
+        ft.Text(" ⚬ O mini-mapa no canto mostra o bracket inteiro e a região visível; clique nele para ir direto até aquela parte."),
+        ft.Text(" ⚬ Ao afastar o zoom, os confrontos viram caixas compactas ou barras coloridas (menu “Detalhe”); clique em uma delas para editar aquela região com os controles completos."),
+        ft.Text("● 🗂️ Sub-chave", size=16, weight=ft.FontWeight.BOLD),
+        ft.Text(" ⚬ Clique direito em um confronto (ou clique longo numa caixa compacta) para abrir só a parte da chave que leva até ele, com zoom próprio; ideal para cada mesa acompanhar o seu quadrante."),
+        ft.Text(" ⚬ “Chave Completa” ou Esc volta para a chave inteira; os resultados continuam sincronizados."),
+        ft.Text("● 🔎 Buscar Jogador", size=16, weight=ft.FontWeight.BOLD),
+        ft.Text(" ⚬ Durante o torneio, digite parte do nome (sem se preocupar com acentos ou maiúsculas) para ver em que fase o jogador está; clique no resultado ou pressione Enter para ir até o confronto."),
+        ft.Text("● ⏪ Replay", size=16, weight=ft.FontWeight.BOLD),
+        ft.Text(" ⚬ Cada resultado é gravado com o horário; em “Replay” arraste a barra para ver a chave como estava em qualquer momento. Enquanto isso nenhum resultado é lançado; “Ao vivo” volta ao estado atual."),
+        ft.Text("● 🏓 Quadras", size=16, weight=ft.FontWeight.BOLD),
+        ft.Text(" ⚬ Informe quantas quadras (ou mesas) há, a duração estimada de um jogo e o descanso mínimo entre jogos do mesmo atleta, e toque em “Aplicar”: os confrontos prontos são chamados para as quadras livres assim que os dois jogadores estiverem descansados, primeiro as rodadas mais antigas. O painel mostra quem está em quadra, os próximos chamados e os jogos por hora."),
+        ft.Text("● 🏅 Classificação", size=16, weight=ft.FontWeight.BOLD),
+        ft.Text(" ⚬ Mostra a posição de todos os participantes, atualizada a cada resultado; quem ainda pode ocupar várias posições aparece com a faixa (ex.: 5º–8º). Desempate: vitórias, derrotas, rating e nome. “CSV” e “JSON” salvam a lista completa."),
+        ft.Text("● 📚 Histórico", size=16, weight=ft.FontWeight.BOLD),
+        ft.Text(" ⚬ Com a variável TORNIFY_HISTORY apontando para um arquivo, jogadores e resultados são gravados ao fim de cada rodada; “📊 Histórico” mostra a temporada e, clicando num jogador, os últimos jogos dele."),
+        ft.Text("● 📊 Desempenho", size=16, weight=ft.FontWeight.BOLD),
+        ft.Text(" ⚬ F12 abre o painel de desempenho com tempos (p50/p99) e contagem de controles; “Salvar” grava um perfil em JSON para anexar a relatórios de bugs."),
     ], scroll=ft.ScrollMode.AUTO)
     tutorial_inner = ft.Container(
         width=400,
@@ -1540,21 +4878,24 @@ def main(page: ft.Page):
 
     page.overlay.append(tutorial_overlay)
 
+    @batched("show_tutorial")
     def show_tutorial(e):
         tutorial_overlay.visible = True
         tutorial_overlay.offset = ft.Offset(0, 0)
-        page.update()
+        request_update()
 
     async def hide_tutorial():
         await asyncio.sleep(0.4)
         tutorial_overlay.visible = False
-        page.update()
+        request_update()
 
+    @batched("close_tutorial")
     def close_tutorial(e):
         tutorial_overlay.offset = ft.Offset(1, 0)
-        tutorial_overlay.update()
+        request_update(tutorial_overlay)
         page.run_task(hide_tutorial)
 
     apply_theme(None)
 
-ft.app(target=main, assets_dir="assets")
+if __name__ == "__main__":
+    ft.app(target=main, assets_dir="assets")